@@ -1,11 +1,288 @@
-from flask import Flask, request, jsonify, render_template
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache, wraps
+from operator import itemgetter
+from flask import Flask, Response, request, render_template
+from flask.json.provider import DefaultJSONProvider
 from pathlib import Path
+import hashlib
+import json
+import multiprocessing
 import os
+import pickle
+import threading
 import storage as st
-from parser_infa import parse_repo_file
-from lineage import upstream_lineage_multi
+# parser_infa (lxml) and lineage are imported where first needed: a cache-hit start never parses XML.
+
+# ---- Optional fast JSON encoder (orjson). Falls back to stdlib json if missing.
+try:
+    import orjson as _orjson
+    def _dumps(obj) -> bytes:
+        return _orjson.dumps(obj)
+    _HAS_ORJSON = True
+except Exception:  # pragma: no cover
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+    _HAS_ORJSON = False
+
+
+class _ORJSONProvider(DefaultJSONProvider):
+    """Serialize route return values (dict/list) with orjson instead of stdlib json."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return _orjson.dumps(obj).decode("utf-8")
+
+    def response(self, *args, **kwargs) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(_dumps(obj), mimetype=self.mimetype)
+
 
 app = Flask(__name__)
+if _HAS_ORJSON:
+    app.json = _ORJSONProvider(app)
+
+# A folder of repo XMLs (or a single XML file). Parsed results are cached under <dir>/.cache.
+MAPPINGS_DIR = Path(os.environ.get("INFA_XML_PATH", "samples"))
+PRELOAD_ON_START = os.environ.get("INFA_PRELOAD", "1") == "1"
+AUTO_LOAD_IF_EMPTY = os.environ.get("INFA_AUTO_LOAD", "1") == "1"
+PARSE_WORKERS = int(os.environ.get("INFA_PARSE_WORKERS", os.cpu_count() or 1))
+CORPUS_CACHE_VERSION = 1
+
+
+def _code_fingerprint() -> str:
+    """Digest of the modules that shape the cached ops/tables, so a cache written by an older
+    parser or storage layout is discarded instead of replayed."""
+    h = hashlib.sha1()
+    for name in ("parser_infa.py", "storage.py"):
+        try:
+            h.update(Path(__file__).with_name(name).read_bytes())
+        except OSError:
+            h.update(name.encode())
+    return h.hexdigest()
+
+
+_CACHE_KEY = (CORPUS_CACHE_VERSION, _code_fingerprint())
+
+
+def _iter_xml_files(root: str):
+    # DirEntry.is_dir()/is_file() come from the directory read, so no extra stat per entry.
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_xml_files(entry.path)
+            elif entry.is_file(follow_symlinks=False) and entry.name.lower().endswith(".xml"):
+                yield entry.path
+
+
+def _xml_files_in_dir(path: Path) -> list:
+    """Every *.xml under `path` (recursively), sorted; or [path] if it is a single file."""
+    if path.is_file():
+        return [str(path)]
+    if not path.is_dir():
+        return []
+    return sorted(_iter_xml_files(str(path)))
+
+
+def _corpus_cache_path() -> Path:
+    root = MAPPINGS_DIR if MAPPINGS_DIR.is_dir() else MAPPINGS_DIR.parent
+    return root / ".cache" / "corpus.pkl"
+
+
+def _read_corpus_cache() -> dict:
+    try:
+        with open(_corpus_cache_path(), "rb") as f:
+            cache = pickle.load(f)
+    except Exception:
+        return {}
+    return cache if cache.get("version") == _CACHE_KEY else {}
+
+
+def _write_corpus_cache(cache: dict) -> None:
+    path = _corpus_cache_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"[WARN] could not write corpus cache {path}: {e}")
+
+
+# The pool is started from /api/reset's background thread in a threaded server; forking such a
+# process can deadlock the child on a lock another thread held, so never use "fork".
+_POOL_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+
+
+def _parse_files(paths: list, on_done=None) -> dict:
+    """Parse files into recorded write ops, fanning out across processes when worthwhile.
+    Returns {path: ops or Exception}. on_done() is called once per finished file."""
+    if not paths:
+        return {}
+    from parser_infa import record_repo_file
+
+    workers = min(PARSE_WORKERS, len(paths))
+    out = {}
+    if workers <= 1:
+        for p in paths:
+            try:
+                out[p] = record_repo_file(p)
+            except Exception as e:
+                out[p] = e
+            if on_done:
+                on_done()
+        return out
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_POOL_CONTEXT) as ex:
+        futures = {ex.submit(record_repo_file, p): p for p in paths}
+        for f in as_completed(futures):
+            out[futures[f]] = f.exception() or f.result()
+            if on_done:
+                on_done()
+    return out
+
+
+@lru_cache(maxsize=4096)
+def _lineage_cached(field: str, corpus_sig: tuple) -> list:
+    """Lineage rows for `field` over the corpus with signature `corpus_sig`
+    (st.corpus_signature()): keyed on it so a reload done by another worker process is seen
+    here too. A reload in this process also clears the cache to free the old entries."""
+    from lineage import upstream_lineage_multi
+    return upstream_lineage_multi(field)
+
+
+def _clear_query_caches() -> None:
+    _lineage_cached.cache_clear()
+    _summary_cached.cache_clear()
+
+
+# Held while storage is swapped to a new corpus and while queries read it, so a query never
+# sees half-written tables (or caches a result computed from them).
+_CORPUS_LOCK = threading.RLock()
+# Only one (re)load builds at a time; /api/reset runs it in the background.
+_RELOAD_LOCK = threading.Lock()
+RELOAD_STATUS = {"running": False, "files_done": 0, "files_total": 0}
+
+
+def _build_corpus() -> tuple:
+    """Build the tables for every XML under MAPPINGS_DIR in memory, without touching storage.
+    Returns (tables, load info). Progress is reported through RELOAD_STATUS.
+
+    Each file is keyed by its (mtime_ns, size) signature. If every signature matches the
+    on-disk cache, the cached tables are used as-is and no XML is parsed. Otherwise only
+    the changed files are parsed; unchanged files replay their cached writes, in file order,
+    so the result is identical to a full reparse. Changed files are parsed in parallel.
+    """
+    xmls = _xml_files_in_dir(MAPPINGS_DIR)
+    sigs = {}
+    for p in xmls:
+        s = os.stat(p)
+        sigs[p] = (s.st_mtime_ns, s.st_size)
+    RELOAD_STATUS.update(files_done=0, files_total=len(xmls))
+
+    cache = _read_corpus_cache()
+    if xmls and cache.get("signatures") == sigs:
+        RELOAD_STATUS["files_done"] = len(xmls)
+        return cache["tables"], {"files": len(xmls), "loaded": xmls, "errors": [], "skipped": True}
+
+    def done():
+        RELOAD_STATUS["files_done"] += 1
+
+    cached_ops = {p: hit[1] for p, hit in cache.get("ops", {}).items() if hit[0] == sigs.get(p)}
+    RELOAD_STATUS["files_done"] = len([p for p in xmls if p in cached_ops])
+    parsed = _parse_files([p for p in xmls if p not in cached_ops], on_done=done)
+    tables = {t: [] for t in st.TABLES}
+    indexes = {}   # key indexes shared by every replay() below, so the merge is linear
+    ops_by_file, loaded, errors = {}, [], []
+    for p in xmls:
+        ops = cached_ops[p] if p in cached_ops else parsed[p]
+        if isinstance(ops, Exception):
+            errors.append({"file": p, "error": str(ops)})
+            continue
+        st.replay(ops, tables, indexes)
+        ops_by_file[p] = (sigs[p], ops)
+        loaded.append(p)
+
+    _write_corpus_cache({
+        "version": _CACHE_KEY,
+        "signatures": {p: sig for p, (sig, _) in ops_by_file.items()},
+        "ops": ops_by_file,
+        "tables": tables,
+    })
+    return tables, {"files": len(loaded), "loaded": loaded, "errors": errors, "skipped": False}
+
+
+def load_all_mappings_from_dir() -> dict:
+    """(Re)load storage from every XML under MAPPINGS_DIR (see _build_corpus).
+    Queries keep reading the previous corpus until the new one is swapped in."""
+    global LOAD_INFO
+    with _RELOAD_LOCK:
+        RELOAD_STATUS["running"] = True
+        try:
+            tables, info = _build_corpus()
+            with _CORPUS_LOCK:
+                st.reset_all()
+                st.load_snapshot(tables)
+                _clear_query_caches()
+                st.edge_port_ids_lc()  # derive lowercased edge ids once per corpus, not on first request
+                LOAD_INFO = info
+        finally:
+            RELOAD_STATUS["running"] = False
+    return info
+
+
+def _reload_in_background() -> None:
+    try:
+        load_all_mappings_from_dir()
+    except Exception as e:
+        print(f"[WARN] background reload failed: {e}")
+
+
+def _json_stream(rows: list, chunk: int = 1000) -> Response:
+    """Stream a JSON array in chunks instead of building the whole body in memory."""
+    def gen():
+        yield b"["
+        for i in range(0, len(rows), chunk):
+            part = b",".join(_dumps(r) for r in rows[i:i + chunk])
+            yield (b"," if i else b"") + part
+        yield b"]"
+    return Response(gen(), mimetype="application/json")
+
+
+def _etagged(view):
+    """Weak ETag for read-only views: the response only depends on the corpus, the path and the
+    query string, so a matching If-None-Match gets a 304 without running the view at all.
+
+    The tag is derived from the table files' signature (not a per-process counter), so every
+    worker process agrees on it, and it is taken under _CORPUS_LOCK together with the body."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with _CORPUS_LOCK:
+            h = hashlib.sha1(repr(st.corpus_signature()).encode())
+            h.update(request.path.encode())
+            h.update(request.query_string)
+            etag = h.hexdigest()[:20]
+            if request.if_none_match.contains_weak(etag):
+                resp = Response(status=304)
+            else:
+                resp = app.make_response(view(*args, **kwargs))
+        resp.set_etag(etag, weak=True)
+        return resp
+    return wrapper
+
+
+def _autoloaded(view):
+    """Load the corpus once before the view runs if nothing is loaded yet (INFA_AUTO_LOAD).
+    Kept outside _etagged: loading takes _RELOAD_LOCK, which must not be waited on while
+    holding _CORPUS_LOCK."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if AUTO_LOAD_IF_EMPTY and not RELOAD_STATUS["running"] and not st.all_rows("mappings"):
+            load_all_mappings_from_dir()
+        return view(*args, **kwargs)
+    return wrapper
+
 
 @app.route("/")
 def index():
@@ -27,165 +304,163 @@ def health():
 @app.route("/api/reset", methods=["POST"]) 
 def reset():
     """(Re)load Informatica mappings. Supports single big XML file or a folder of XMLs.
-    Default path: samples/mappings.xml (set INFA_XML_PATH to override)."""
-    # clear all tables
-    st.reset_all()
+    Default path: samples/ (set INFA_XML_PATH to override). Unchanged files come from the corpus cache.
 
-    path = os.environ.get("INFA_XML_PATH", os.path.join("samples", "mappings.xml"))
-    loaded, errors = [], []
+    The reload runs in a background thread and lookups keep using the old corpus until it is
+    swapped in; poll /api/reset/status for progress. Pass ?wait=1 to block until it is done."""
+    if request.args.get("wait") == "1":
+        info = load_all_mappings_from_dir()
+        return {"loaded": info["loaded"], "errors": info["errors"]}
+    if not RELOAD_STATUS["running"]:
+        RELOAD_STATUS.update(running=True, files_done=0, files_total=0)
+        threading.Thread(target=_reload_in_background, daemon=True).start()
+    return reset_status(), 202
 
-    try:
-        if os.path.isfile(path):
-            parse_repo_file(path)
-            loaded.append(path)
-        else:
-            # Fallback: parse every *.xml under the directory as a repo file
-            import glob
-            for p in sorted(glob.glob(os.path.join(path, "*.xml"))):
-                parse_repo_file(p)
-                loaded.append(p)
-    except Exception as e:
-        errors.append({"file": path, "error": str(e)})
 
-    return jsonify({"loaded": loaded, "errors": errors})
+@app.route("/api/reset/status")
+def reset_status():
+    out = dict(RELOAD_STATUS)
+    if not out["running"]:
+        out["loaded"] = LOAD_INFO.get("loaded", [])
+        out["errors"] = LOAD_INFO.get("errors", [])
+    return out
 
 
 @app.route("/api/lookup")
+@_autoloaded   # one-time lazy load when the first lookup happens (if nothing is loaded yet)
+@_etagged
 def lookup():
     field = request.args.get("field", "")
-    # One-time lazy load when first lookup happens (if nothing is loaded yet)
-    if AUTO_LOAD_IF_EMPTY and not st.all_rows("mappings"):
-        global LOAD_INFO
-        LOAD_INFO = load_all_mappings_from_dir()
-    rows = upstream_lineage_multi(field)
-    return jsonify(rows)
+    with _CORPUS_LOCK:
+        rows = _lineage_cached(field, st.corpus_signature())
+    return rows
 
 
 @app.route("/api/debug/mappings")
+@_etagged
 def debug_mappings():
-    return jsonify(st.all_rows("mappings"))
+    with _CORPUS_LOCK:
+        rows = st.all_rows("mappings")
+    return _json_stream(rows)
 
 
 @app.route("/api/debug/targets")
+@_etagged
 def debug_targets():
     like = (request.args.get("like", "") or "").lower().replace("_", "")
     rows = []
-    ports = st.all_rows("ports")
-    insts = {r["instance_id"]: r for r in st.all_rows("instances")}
-    maps = {r["mapping_id"]: r for r in st.all_rows("mappings")}
-    edges = st.all_rows("edges")
-    has_out = {e["from_port_id"] for e in edges}
-    for p in ports:
-        inst = insts.get(p["instance_id"])
-        if not inst:
-            continue
-        is_targetish = (inst.get("type") == "Target") or (
-            p["direction"] == "INPUT" and p["port_id"] not in has_out
-        )
-        if not is_targetish:
-            continue
-        norm = p["name"].lower().replace("_", "")
-        if like in norm if like else True:
-            rows.append(
-                {
-                    "mapping": maps[inst["mapping_id"]]["name"],
-                    "target": inst["name"],
-                    "column": p["name"],
-                    "port_id": p["port_id"],
-                }
-            )
-    return jsonify(rows)
+    with _CORPUS_LOCK:
+        insts = st.index("instances", "instance_id")
+        maps = st.index("mappings", "mapping_id")
+        for norm, p in st.targetish_ports_norm():
+            if like in norm:
+                inst = insts[p["instance_id"]]
+                rows.append(
+                    {
+                        "mapping": maps[inst["mapping_id"]]["name"],
+                        "target": inst["name"],
+                        "column": p["name"],
+                        "port_id": p["port_id"],
+                    }
+                )
+    return rows
 
 
 @app.route("/api/debug/edges")
+@_etagged
 def debug_edges():
     to_like = (request.args.get("to_like", "") or "").lower()
     fr_like = (request.args.get("from_like", "") or "").lower()
-    edges = st.all_rows("edges")
-    rows = []
-    for e in edges:
-        to_ok = to_like in e["to_port_id"].lower() if to_like else True
-        fr_ok = fr_like in e["from_port_id"].lower() if fr_like else True
-        if to_ok and fr_ok:
-            rows.append(e)
-    return {"count": len(rows), "sample": rows[:100]}
+    with _CORPUS_LOCK:
+        if not (to_like or fr_like):
+            edges = st.all_rows("edges")
+            return {"count": len(edges), "sample": edges[:100]}
+        # "" is a substring of everything, so an empty filter needs no special case
+        count, sample = 0, []
+        for to_lc, fr_lc, e in st.edges_lc():
+            if to_like in to_lc and fr_like in fr_lc:
+                count += 1
+                if count <= 100:
+                    sample.append(e)
+    return {"count": count, "sample": sample}
 
 
 @app.route("/api/summary")
+@_etagged
 def summary():
     """
     Returns:
       - pair_rows: unique end-to-end pairs as DB.SCHEMA.TABLE.FIELD -> DB.SCHEMA.TABLE.FIELD (+ mapping)
       - summary_rows: per-mapping rollup (steps/exprs/joins)
     """
-    from lineage import upstream_lineage_multi
-    import storage as st
-    from collections import defaultdict
+    with _CORPUS_LOCK:
+        out = _summary_cached(request.args.get("field", ""), st.corpus_signature())
+    return out
 
-    field = request.args.get("field", "")
-    rows = upstream_lineage_multi(field)
-
-    # ---- indices for physical resolution ----
-    maps = st.all_rows("mappings")
-    map_ids_by_name = {}
-    for m in maps:
-        map_ids_by_name.setdefault(m["name"], []).append(m["mapping_id"])
-
-    insts = st.all_rows("instances")
-    inst_exists = {i["instance_id"] for i in insts}
 
-    # instance -> physical object
-    inst_phys = st.all_rows("instance_phys")  # [{"instance_id","object_id","role"}]
-    inst_to_obj = {r["instance_id"]: r["object_id"] for r in inst_phys}
+@lru_cache(maxsize=1024)
+def _summary_cached(field: str, corpus_sig: tuple) -> dict:
+    rows = _lineage_cached(field, corpus_sig)
 
-    phys_idx = st.by_id("physical_objects", "object_id")  # {object_id: {..., full_name}}
-
-    def resolve_instance_id(mapping_name: str, instance_name: str) -> str:
-        """Find the concrete instance_id for (mapping, instance) or ''."""
-        if not (mapping_name and instance_name):
-            return ""
-        for mid in map_ids_by_name.get(mapping_name, []):
-            iid = f"{mid}:{instance_name}"
-            if iid in inst_exists:
-                return iid
-        return ""
+    # ---- indices for physical resolution (memoized in storage) ----
+    iid_by_map_inst = st.instance_id_by_mapping_and_name()  # {(mapping name, instance name): instance_id}
+    inst_to_obj = st.inst_to_obj_map()                       # {instance_id: object_id}
+    phys_idx = st.index("physical_objects", "object_id")     # {object_id: {..., full_name}}
 
     def fqf(mapping_name: str, instance_name: str, field_name: str) -> str:
         """Return DB.SCHEMA.TABLE.FIELD if resolvable, else just FIELD."""
         if not field_name:
             return ""
-        iid = resolve_instance_id(mapping_name, instance_name)
+        iid = iid_by_map_inst.get((mapping_name, instance_name), "")
         obj_id = inst_to_obj.get(iid, "")
         obj = phys_idx.get(obj_id, {}) if obj_id else {}
         full = obj.get("full_name", "")
         return f"{full}.{field_name}" if full else field_name
 
-    # ---- group rows by chain ----
-    rows_by_chain = defaultdict(list)
+    # ---- one pass: group rows by chain and roll them up per mapping ----
+    rows_by_chain = {}
+    agg = {}
     for r in rows:
-        rows_by_chain[r.get("chain_id", 1)].append(r)
+        cid = r.get("chain_id", 1)
+        if cid in rows_by_chain:
+            rows_by_chain[cid].append(r)
+        else:
+            rows_by_chain[cid] = [r]
+        k = r.get("mapping", "")
+        g = agg.get(k)
+        if g is None:
+            g = agg[k] = {"mapping": k, "steps": 0, "exprs": set(), "joins": set()}
+        g["steps"] += 1
+        if r.get("expression"):
+            g["exprs"].add(r["expression"])
+        if r.get("join_condition"):
+            g["joins"].add(r["join_condition"])
 
     pair_set = set()
     pair_rows = []
 
     def is_real_inst(name: str) -> bool:
-        return bool(name) and not str(name).startswith("(")  # exclude "(SOURCE)"/"(TARGET)" markers
+        return bool(name) and name[:1] != "("  # exclude "(SOURCE)"/"(TARGET)" markers
 
     for cid, crs in rows_by_chain.items():
-        # primary (type-based) leaf/tail detection
-        leaves = [r for r in crs
-                  if (r.get("from_type","").lower() == "source") and is_real_inst(r.get("from_instance",""))]
-        tails  = [r for r in crs
-                  if (r.get("to_type","").lower() == "target") and is_real_inst(r.get("to_instance",""))]
+        # one pass: primary (type-based) leaf/tail detection + the keys the fallback needs
+        leaves, tails, to_keys, from_keys = [], [], set(), set()
+        for r in crs:
+            fi, ti = r.get("from_instance"), r.get("to_instance")
+            from_keys.add((fi, r.get("from_port")))
+            to_keys.add((ti, r.get("to_port")))
+            if r.get("from_type", "").lower() == "source" and is_real_inst(fi):
+                leaves.append(r)
+            if r.get("to_type", "").lower() == "target" and is_real_inst(ti):
+                tails.append(r)
 
         # fallback: set-difference heuristic if types are missing
-        if not leaves or not tails:
-            to_keys   = set(f"{r.get('to_instance')}::{r.get('to_port')}"   for r in crs)
-            from_keys = set(f"{r.get('from_instance')}::{r.get('from_port')}" for r in crs)
-            if not leaves:
-                leaves = [r for r in crs if f"{r.get('from_instance')}::{r.get('from_port')}" not in to_keys and is_real_inst(r.get("from_instance",""))]
-            if not tails:
-                tails  = [r for r in crs if f"{r.get('to_instance')}::{r.get('to_port')}" not in from_keys and is_real_inst(r.get("to_instance",""))]
+        if not leaves:
+            leaves = [r for r in crs if (r.get("from_instance"), r.get("from_port")) not in to_keys
+                      and is_real_inst(r.get("from_instance", ""))]
+        if not tails:
+            tails = [r for r in crs if (r.get("to_instance"), r.get("to_port")) not in from_keys
+                     and is_real_inst(r.get("to_instance", ""))]
 
         # build pairs
         for leaf in leaves:
@@ -205,21 +480,11 @@ def summary():
                 })
 
     # nice stable ordering
-    pair_rows.sort(key=lambda r: (r["mapping"], r["target"], r["source"]))
-
-    # ---- per-mapping rollup (unchanged) ----
-    agg = {}
-    for r in rows:
-        k = r.get("mapping", "")
-        g = agg.setdefault(k, {"mapping": k, "steps": 0, "exprs": set(), "joins": set()})
-        g["steps"] += 1
-        if r.get("expression"):
-            g["exprs"].add(r["expression"])
-        if r.get("join_condition"):
-            g["joins"].add(r["join_condition"])
+    pair_rows.sort(key=itemgetter("mapping", "target", "source"))
 
+    # ---- per-mapping rollup (accumulated above) ----
     summary_rows = []
-    for g in sorted(agg.values(), key=lambda x: x["mapping"]):
+    for g in sorted(agg.values(), key=itemgetter("mapping")):
         summary_rows.append({
             "mapping": g["mapping"],
             "steps": g["steps"],
@@ -229,12 +494,18 @@ def summary():
             "join_examples": list(g["joins"])[:1],
         })
 
-    return jsonify({
+    return {
         "total_rows": len(rows),
         "pair_rows": pair_rows,
         "summary_rows": summary_rows,
-    })
+    }
+
 
+LOAD_INFO = {}
+# Spawned pool workers (the default start method on Windows/macOS) re-import this module;
+# only the parent process preloads, or each worker would try to start a nested pool.
+if PRELOAD_ON_START and multiprocessing.parent_process() is None:
+    load_all_mappings_from_dir()
 
 
 if __name__ == "__main__":
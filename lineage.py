@@ -1,77 +1,82 @@
 
 from collections import deque
 from difflib import SequenceMatcher
-from typing import List, Dict, Tuple
+from operator import itemgetter
+from typing import Dict, Iterator, List, Tuple
 import storage as st
 import re
 
+# ---- Optional C fuzzy matcher (rapidfuzz). Falls back to difflib.SequenceMatcher if missing.
+try:
+    from rapidfuzz import fuzz as _rf_fuzz, process as _rf_process
+    _HAS_RAPIDFUZZ = True
+except Exception:  # pragma: no cover
+    _HAS_RAPIDFUZZ = False
+
 CROSSWORKFLOW_EXACT_ONLY = True
-REQUIRE_UNIQUE_UPSTREAM = True
 
 _IDENT = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
 
-def _resolved_expr_for_edge(up_pid: str, cur_pid: str, ports_idx: dict) -> str:
-    """
-    Prefer the OUTPUT expression unless it is a simple alias (single identifier)
-    pointing to the upstream port name; in that case show the upstream port's formula.
-    Falls back to upstream expr if OUTPUT has none.
-    """
-    cur_expr = _expr_for_port(cur_pid)
-    if cur_expr:
-        token = cur_expr.strip()
-        if _IDENT.match(token):
-            up = ports_idx.get(up_pid)
-            if up and token.lower() == (up.get("name","").lower()):
-                # OUTPUT just references the VAR; show the VAR's actual formula
-                return _expr_for_port(up_pid) or cur_expr
-        return cur_expr
-    # no OUTPUT expr -> maybe the VAR/input carries the formula
-    return _expr_for_port(up_pid)
+# Lineage hops are built as plain tuples in this field order and become dicts only once a
+# chain is finished (cheaper to allocate and sort than 14-key dicts).
+_HOP_FIELDS = ("chain_id", "level", "mapping",
+               "from_instance", "from_port", "from_type",
+               "to_instance", "to_port", "to_type",
+               "operation", "expression", "join_condition", "stage", "evidence")
+_HOP_ORDER = itemgetter(1, 12, 2, 3, 4)  # level, stage, mapping, from_instance, from_port
+
+# [\W_] is exactly "not str.isalnum()" for str patterns, so one C-level sub() replaces the per-char genexpr
+_NON_ALNUM = re.compile(r"[\W_]+")
 
 def _norm(s: str) -> str:
-    return "".join(ch for ch in (s or "").lower() if ch.isalnum())
+    return _NON_ALNUM.sub("", (s or "").lower())
 
 def _idnorm(pid: str) -> str:
     return (pid or "").lower()
 
-def _best_name_match(name: str, candidates: List[str], threshold: float = 0.82) -> Tuple[str, float]:
+def _best_name_match(name: str, candidates: List[str], threshold: float = 0.82,
+                     norms: List[str] = None, by_norm: Dict[str, str] = None) -> Tuple[str, float]:
+    """Closest candidate to `name` by normalized-name ratio; score is 0.0 below `threshold`.
+    `norms` (the candidates' _norm() values) and `by_norm` (_norm() -> first candidate) may be
+    passed in when the caller has them prepared."""
     if not candidates:
         return ("", 0.0)
     n = _norm(name)
-    for c in candidates:
-        if _norm(c) == n:
-            return (c, 1.0)
+    if norms is None:
+        norms = [_norm(c) for c in candidates]  # once per candidate, shared by both passes
+    if _HAS_RAPIDFUZZ:
+        # one C call: only identical strings score 100, and the first best hit is returned,
+        # so this also covers the exact-match pass below
+        hit = _rf_process.extractOne(n, norms, scorer=_rf_fuzz.ratio)
+        if not hit or hit[1] <= 0:
+            return ("", 0.0)
+        score = hit[1] / 100.0
+        return (candidates[hit[2]], score if score >= threshold else 0.0)
+    # exact pass: a hash probe when prepared, else one C-level scan of the norms
+    if by_norm is not None:
+        hit = by_norm.get(n)
+        if hit is not None:
+            return (hit, 1.0)
+    elif n in norms:
+        return (candidates[norms.index(n)], 1.0)
     best, score = "", 0.0
-    for c in candidates:
-        s = SequenceMatcher(None, n, _norm(c)).ratio()
+    sm = SequenceMatcher(None, n)
+    for c, cn in zip(candidates, norms):
+        sm.set_seq2(cn)
+        # cheap upper bounds first (length-only, then multiset): skip candidates that cannot win
+        if sm.real_quick_ratio() <= score or sm.quick_ratio() <= score:
+            continue
+        s = sm.ratio()
         if s > score:
             best, score = c, s
     return (best, score if score >= threshold else 0.0)
 
+# memoized in storage until the underlying table changes; treat the dicts as read-only
 def _index_ports() -> Dict[str, Dict]:
-    return st.by_id("ports", "port_id")
+    return st.index("ports", "port_id")
 
 def _index_instances() -> Dict[str, Dict]:
-    return st.by_id("instances", "instance_id")
-
-def _mapping_name_by_instance_id(instance_id: str) -> str:
-    inst = _index_instances().get(instance_id)
-    if not inst:
-        return ""
-    mapping = st.where("mappings", mapping_id=inst["mapping_id"])
-    return mapping[0]["name"] if mapping else ""
-
-def _expr_for_port(port_id: str) -> str:
-    for e in st.all_rows("expressions"):
-        if e.get("kind") == "expr" and e.get("port_id") == port_id:
-            return e.get("raw", "")
-    return ""
-
-def _join_for_instance(instance_id: str) -> str:
-    for e in st.all_rows("expressions"):
-        if e.get("kind") == "join" and str(e.get("port_id","")).startswith(instance_id):
-            return e.get("raw", "")
-    return ""
+    return st.index("instances", "instance_id")
 
 
 def find_target_ports_by_field(field_like: str) -> List[Dict]:
@@ -85,61 +90,68 @@ def find_target_ports_by_field(field_like: str) -> List[Dict]:
     if not q_ci:
         return []
 
-    ports = st.all_rows("ports")
     insts = _index_instances()
-    edges = st.all_rows("edges")
+    mapping_name_by_inst = st.mapping_name_by_instance()
+    has_out_norm, has_in_norm = st.edge_port_ids_lc()
 
-    has_out_norm = { (e["from_port_id"] or "").lower() for e in edges }
-    has_in_norm  = { (e["to_port_id"]   or "").lower() for e in edges }
+    # starts that already have inbound edges sort first; the lowercased port_id is computed once per port
+    fed: List[Dict] = []
+    unfed: List[Dict] = []
 
-    results: List[Dict] = []
-
-    for p in ports:
+    # EXACT match only (case-insensitive). Do NOT strip underscores/punctuation.
+    for p in st.ports_by_name_lc().get(q_ci, ()):
         inst = insts.get(p["instance_id"])
         if not inst:
             continue
 
         # treat as a target column if it's a real Target instance
         # OR an INPUT sink with no outgoing edge
+        pid_lc = (p["port_id"] or "").lower()
         is_targetish = (inst.get("type") == "Target") or (
-            p.get("direction") == "INPUT" and (p["port_id"] or "").lower() not in has_out_norm
+            p.get("direction") == "INPUT" and pid_lc not in has_out_norm
         )
         if not is_targetish:
             continue
 
-        # EXACT match only (case-insensitive). Do NOT strip underscores/punctuation.
-        if (p.get("name", "") or "").lower() != q_ci:
-            continue
-
-        results.append({
+        (fed if pid_lc in has_in_norm else unfed).append({
             "port_id": p["port_id"],
             "instance_id": p["instance_id"],
             "port_name": p["name"],
             "instance_name": inst["name"],
-            "mapping_name": _mapping_name_by_instance_id(p["instance_id"]).strip()
+            "mapping_name": mapping_name_by_inst.get(p["instance_id"], "").strip()
         })
 
-    # deterministic: prefer starts that already have inbound edges
-    results.sort(key=lambda r: ((r["port_id"] or "").lower() not in has_in_norm,
-                                r["mapping_name"], r["instance_name"], r["port_name"]))
-    return results
-
-def attach_expr_and_join(from_port_id: str, from_instance_id: str) -> Dict[str, str]:
-    exprs = [e for e in st.all_rows("expressions") if e["port_id"] == from_port_id and e["kind"] == "expr"]
-    expr = exprs[0]["raw"] if exprs else ""
-    joiners = [e for e in st.all_rows("expressions") if e["kind"] == "join" and e["port_id"].startswith(from_instance_id)]
-    join_cond = joiners[0]["raw"] if joiners else ""
-    return {"expression": expr, "join_condition": join_cond}
-
-def _target_instance_for_physical(mapping_id: str, full_name: str) -> str:
-    phys = st.by_id("physical_objects", "object_id")
-    for mt in st.all_rows("map_targets"):
-        if mt["mapping_id"] != mapping_id:
-            continue
-        obj = phys.get(mt["object_id"])
-        if obj and obj["full_name"] == full_name:
-            return obj["name"]
-    return ""
+    # deterministic: fed starts first, each half ordered by name
+    by_name = itemgetter("mapping_name", "instance_name", "port_name")
+    fed.sort(key=by_name)
+    unfed.sort(key=by_name)
+    return fed + unfed
+
+def _resolve_cross_col(inputs_by_lc: Dict[str, Dict], col_name: str, exact_col: str,
+                       prepared: Dict = None, inst_id: str = "") -> Tuple[Dict, float]:
+    """Port on an upstream target's INPUT side that continues `col_name`, with its match score.
+    Exact (case-insensitive) name only; with CROSSWORKFLOW_EXACT_ONLY off, falls back to the
+    best fuzzy name match. `prepared` caches each instance's (ports, names, norms, by_norm)
+    candidate lists across calls, so the fuzzy path normalizes an instance's ports only once."""
+    port = inputs_by_lc.get(exact_col)
+    if port or CROSSWORKFLOW_EXACT_ONLY or not inputs_by_lc:
+        return port, 1.0
+    cands = prepared.get(inst_id) if prepared is not None else None
+    if cands is None:
+        ports = list(inputs_by_lc.values())
+        names = [p["name"] for p in ports]
+        norms = [_norm(c) for c in names]
+        by_norm = {}
+        for c, cn in zip(names, norms):
+            by_norm.setdefault(cn, c)
+        cands = (ports, names, norms, by_norm)
+        if prepared is not None:
+            prepared[inst_id] = cands
+    ports, names, norms, by_norm = cands
+    name, score = _best_name_match(col_name, names, norms=norms, by_norm=by_norm)
+    if not score:
+        return None, 0.0
+    return ports[names.index(name)], score
 
 
 
@@ -151,184 +163,162 @@ def upstream_lineage_multi(field: str, max_rows: int = 10000) -> List[Dict]:
     - Cross-workflow: exact physical object + exact column name.
     - Returns rows grouped per target ('chain_id'), ordered by 'level' and 'step_no'.
     """
-    edges = st.all_rows("edges")
-    ports_idx = st.by_id("ports", "port_id")
-    inst_idx  = st.by_id("instances", "instance_id")
-    maps_idx  = st.by_id("mappings", "mapping_id")
-
-    # instance → physical object (only for role=Source/Target as recorded by the parser)
-    inst_phys_rows = st.all_rows("instance_phys")
-    inst_to_obj = { r["instance_id"]: r["object_id"] for r in inst_phys_rows }  # we’ll filter by role when needed
-    phys_idx = st.by_id("physical_objects", "object_id")
-
-    # SQ instance → [associated source instance names]
-    sq_rows = st.all_rows("sq_assoc")
-    sq_to_sources = {}
-    for r in sq_rows:
-        sq_to_sources.setdefault(r["sq_instance_id"], []).append(r["source_instance_name"])
-
-
-    def _idnorm(pid: str) -> str:
-        return (pid or "").lower()
-
-    # to_port -> [from_port...]
-    to_index: Dict[str, List[str]] = {}
-    for e in edges:
-        to_index.setdefault(_idnorm(e["to_port_id"]), []).append(e["from_port_id"])
-
-    # physical target map: full_name -> [mapping names]
-    phys = st.by_id("physical_objects", "object_id")
-    tgt_map_by_full = {}
-    for mt in st.all_rows("map_targets"):
-        full = phys[mt["object_id"]]["full_name"]
-        tgt_map_by_full.setdefault(full, []).append(maps_idx[mt["mapping_id"]]["name"])
-
-    def _target_instance_for_physical(mapping_id: str, full_name: str) -> str:
-        for mt in st.all_rows("map_targets"):
-            if mt["mapping_id"] != mapping_id:
-                continue
-            obj = phys.get(mt["object_id"])
-            if obj and obj["full_name"] == full_name:
-                return obj["name"]
-        return ""
+    return list(upstream_lineage_multi_iter(field, max_rows))
+
+
+def upstream_lineage_multi_iter(field: str, max_rows: int = 10000) -> Iterator[Dict]:
+    """upstream_lineage_multi() as a generator: each chain's rows are yielded as soon as that
+    chain is finished, already in (chain_id, step_no) order."""
+    ports_idx = _index_ports()
+    inst_idx  = _index_instances()
+    maps_idx  = st.index("mappings", "mapping_id")
+
+    # expressions: port_id -> raw expr, instance_id -> raw join (bound once; probed per edge)
+    expr_by_port = st.expr_by_port()
+    join_by_inst = st.join_by_instance()
+
+    # Cross-workflow resolution, all memoized in storage per corpus:
+    #   instance → physical full_name (via instance_phys, as recorded by the parser)
+    #   SQ instance → [full_name of each associated source instance that resolves]
+    #   full_name → ((upstream mapping name, mapping_id, target instance_id), ...)
+    full_by_inst = st.full_name_by_instance()
+    sq_src_fulls = st.source_fulls_by_sq()
+    cross_targets = st.cross_targets_by_full()
+
+    # to_port -> ((from_port_id, its _idnorm, from port row, from instance row), ...), built once per corpus in storage
+    to_index: Dict[str, Tuple[tuple, ...]] = st.upstream_hops_by_to_lc()
+
+    # instance_id -> {lowercased INPUT port name: port}
+    input_ports_by_inst = st.input_ports_by_instance()
+    fuzzy_prepared: Dict[str, tuple] = {}   # instance_id -> (ports, names, norms, by_norm), fuzzy fallback only
 
     starts = find_target_ports_by_field(field)  # exact-only, already implemented
 
-    all_rows: List[Dict] = []
+    emitted = 0
     chain_id = 0
 
     for start in starts:
         chain_id += 1
         start_pid = start["port_id"]
 
-        dist = { start_pid: 0 }           # port_id -> hops from target
         visited_ports = { start_pid }
         visited_cross = set()
-        dq = deque([start_pid])
-
-        chain_rows: List[Dict] = []
-
-        while dq and len(all_rows) + len(chain_rows) < max_rows:
-            cur = dq.popleft()
-
-            # upstream edges inside the same mapping
-            ups = to_index.get(_idnorm(cur), [])
-            for up in ups:
-                fp = ports_idx.get(up); tp = ports_idx.get(cur)
-                if not fp or not tp:
+        dq = deque([(start_pid, _idnorm(start_pid), 0)])   # (port_id, normalized port_id, hops from target)
+
+        chain_rows: List[tuple] = []   # _HOP_FIELDS order
+
+        def _cross_by_full(full: str, col_name: str, exact_col: str, src_map_id: str,
+                           level_x: int, pushes: list):
+            # mappings whose TARGET physical equals this full name, already resolved to their target instance
+            for upstream_map_name, _, tgt_inst_id in cross_targets.get(full, ()):
+                # same column on that target's INPUT (exact; fuzzy only if CROSSWORKFLOW_EXACT_ONLY is off)
+                match_port, score = _resolve_cross_col(input_ports_by_inst.get(tgt_inst_id, {}), col_name, exact_col,
+                                                       fuzzy_prepared, tgt_inst_id)
+                if not match_port:
                     continue
-                fi = inst_idx.get(fp["instance_id"]); ti = inst_idx.get(tp["instance_id"])
-                if not fi or not ti:
+
+                # store the 64-bit hash, not the tuple: str hashes are cached, so this is cheap,
+                # and an int entry is far smaller (collision odds ~2**-64 per pair)
+                cross_key = hash((full, upstream_map_name, col_name))
+                if cross_key in visited_cross:
                     continue
+                visited_cross.add(cross_key)
+
+                # record the cross step (level_x sits between levels)
+                chain_rows.append((
+                    chain_id, level_x, f"{maps_idx[src_map_id]['name']} -> {upstream_map_name}",
+                    "(TARGET)", match_port["name"], "Target",
+                    "(SOURCE)", col_name, "Source",
+                    "cross_workflow (exact)" if score == 1.0 else f"cross_workflow (fuzzy {score:.2f})", "", "",
+                    "cross_workflow", full,
+                ))
+
+                next_pid = f"{tgt_inst_id}:{match_port['name']}"
+                if next_pid not in visited_ports:
+                    visited_ports.add(next_pid)
+                    pushes.append((next_pid, _idnorm(next_pid), level_x))
+
+        # hot-loop locals: bound methods and per-port invariants hoisted out of the edge loop
+        popleft = dq.popleft
+        add_row = chain_rows.append
+        mark_visited = visited_ports.add
+
+        while dq and emitted + len(chain_rows) < max_rows:
+            cur, cur_norm, cur_level = popleft()
 
-                level = dist[cur] + 1
-
-                # Expression: prefer the OUTPUT side (cur), else FROM side (up)
-                expr_cur = _expr_for_port(cur)
-                expr_up  = _expr_for_port(up)
-                expr_raw = _resolved_expr_for_edge(up, cur, ports_idx)
-                expr_owner_inst = ti["instance_id"] if _expr_for_port(cur) else fi["instance_id"]
-                join_cond = _join_for_instance(expr_owner_inst)
-
-                chain_rows.append({
-                    "chain_id": chain_id,
-                    "level": level,
-                    "mapping": maps_idx[ti["mapping_id"]]["name"],
-                    "from_instance": fi["name"], "from_port": fp["name"], "from_type": fi["type"],
-                    "to_instance": ti["name"],  "to_port":  tp["name"],  "to_type":  ti["type"],
-                    "operation": "compute" if expr_raw else "passthrough",
-                    "expression": expr_raw,
-                    "join_condition": join_cond,
-                    "stage": "mapping",
-                    "evidence": f"{up}->{cur}",
-                })
+            # upstream edges inside the same mapping
+            ups = to_index.get(cur_norm, ())
+            if not ups:
+                continue
+            tp = ports_idx.get(cur)
+            ti = inst_idx.get(tp["instance_id"]) if tp else None
+            if not ti:
+                continue
+            pushes = []   # queued with one extend() after this port's edges
+            push = pushes.append
+            level = cur_level + 1
+            map_name = maps_idx[ti["mapping_id"]]["name"]
+            ti_name, tp_name, ti_type = ti["name"], tp["name"], ti["type"]
+
+            # Expression: prefer the OUTPUT side (cur), unless it is a simple alias (single
+            # identifier) of the upstream port -- then show the upstream formula. Falls back
+            # to the upstream expr if OUTPUT has none.
+            expr_cur = expr_by_port.get(cur, "")
+            alias_lc = None
+            if expr_cur:
+                token = expr_cur.strip()
+                if _IDENT.match(token):
+                    alias_lc = token.lower()
+                cur_join = join_by_inst.get(ti["instance_id"], "")
+
+            for up, up_norm, fp, fi in ups:
+                if not expr_cur:
+                    expr_raw = expr_by_port.get(up, "")
+                    join_cond = join_by_inst.get(fi["instance_id"], "")
+                else:
+                    if alias_lc is not None and alias_lc == (fp.get("name", "") or "").lower():
+                        expr_raw = expr_by_port.get(up, "") or expr_cur
+                    else:
+                        expr_raw = expr_cur
+                    join_cond = cur_join
+
+                add_row((
+                    chain_id, level, map_name,
+                    fi["name"], fp["name"], fi["type"],
+                    ti_name, tp_name, ti_type,
+                    "compute" if expr_raw else "passthrough", expr_raw, join_cond,
+                    "mapping", f"{up}->{cur}",
+                ))
 
                 if up not in visited_ports:
-                    visited_ports.add(up)
-                    dist[up] = level
-                    dq.append(up)
+                    mark_visited(up)
+                    push((up, up_norm, level))
                     
-                def _cross_by_full(full: str, col_name: str, src_map_id: str):
-                    # mappings whose TARGET physical equals this full name
-                    candidate_map_names = tgt_map_by_full.get(full, [])
-                    if not candidate_map_names:
-                        return
-                    exact_col = (col_name or "").lower()
-                    for upstream_map_name in candidate_map_names:
-                        upstream_map_id = next((mid for mid, m in maps_idx.items()
-                                                if m["name"] == upstream_map_name), "")
-                        if not upstream_map_id:
-                            continue
-                        tgt_inst_name = _target_instance_for_physical(upstream_map_id, full)
-                        if not tgt_inst_name:
-                            continue
-                        # exact column on that target's INPUT
-                        candidate_ports = [p for p in ports_idx.values()
-                            if p["instance_id"] == f"{upstream_map_id}:{tgt_inst_name}" and p["direction"] == "INPUT"]
-                        match_port = next((p for p in candidate_ports
-                                        if (p["name"] or "").lower() == exact_col), None)
-                        if not match_port:
-                            continue
-
-                        cross_key = (full, upstream_map_name, col_name)
-                        if cross_key in visited_cross:
-                            continue
-                        visited_cross.add(cross_key)
-
-                        # record the cross step (use existing variables in your scope)
-                        level_x = dist[cur] + 1  # sits between levels
-                        chain_rows.append({
-                            "chain_id": chain_id,
-                            "level": level_x,
-                            "mapping": f"{maps_idx[src_map_id]['name']} -> {upstream_map_name}",
-                            "from_instance": "(TARGET)", "from_port": match_port["name"], "from_type": "Target",
-                            "to_instance": "(SOURCE)",  "to_port":   col_name,           "to_type":  "Source",
-                            "operation": "cross_workflow (exact)",
-                            "expression": "", "join_condition": "",
-                            "stage": "cross_workflow",
-                            "evidence": full,
-                        })
-
-                        next_pid = f"{upstream_map_id}:{tgt_inst_name}:{match_port['name']}"
-                        if next_pid not in visited_ports:
-                            visited_ports.add(next_pid)
-                            dist[next_pid] = level_x
-                            dq.append(next_pid)
-
-                # Strict cross-workflow: only when FROM instance is a Source
-                fi_type = (fi["type"] or "").lower()
-                # ---- Strict cross-workflow boundary detection ----
+                # ---- Strict cross-workflow boundary detection: only when FROM is a Source (or its SQ) ----
                 fi_type = (fi["type"] or "").lower()
 
                 # CASE 1: true Source instance → cross by its physical object
                 if fi_type == "source":
-                    obj_id = inst_to_obj.get(fi["instance_id"], "")
-                    full = phys_idx.get(obj_id, {}).get("full_name", "") if obj_id else ""
+                    full = full_by_inst.get(fi["instance_id"])
                     if not full:
                         continue
-                    _cross_by_full(full, fp["name"], fi["mapping_id"])
+                    _cross_by_full(full, fp["name"], (fp["name"] or "").lower(), fi["mapping_id"], level, pushes)
 
                 # CASE 2: Source Qualifier instance → cross by each associated Source instance's physical object
                 elif fi_type == "source qualifier":
                     sq_id = fi["instance_id"]                           # e.g., FOLDER:MAP:SQ_LAND_CLAIM
-                    src_names = sq_to_sources.get(sq_id, [])
-                    if not src_names:
-                        continue
-                    for src_name in src_names:
-                        src_inst_id = f"{fi['mapping_id']}:{src_name}"  # instance_id form for the source
-                        obj_id = inst_to_obj.get(src_inst_id, "")
-                        full = phys_idx.get(obj_id, {}).get("full_name", "") if obj_id else ""
-                        if not full:
-                            continue
-                        _cross_by_full(full, fp["name"], fi["mapping_id"])
+                    fulls = sq_src_fulls.get(sq_id, ())
+                    if fulls:
+                        col_lc = (fp["name"] or "").lower()
+                        for full in fulls:
+                            _cross_by_full(full, fp["name"], col_lc, fi["mapping_id"], level, pushes)
 
+            dq.extend(pushes)
 
         # per-chain ordering and step numbering
-        chain_rows.sort(key=lambda r: (r["level"], r["stage"], r["mapping"], r["from_instance"], r["from_port"]))
+        chain_rows.sort(key=_HOP_ORDER)
+        emitted += len(chain_rows)
         for i, row in enumerate(chain_rows, start=1):
-            row["step_no"] = i
-        all_rows.extend(chain_rows)
-
-    # global stable order across chains
-    all_rows.sort(key=lambda r: (r["chain_id"], r["step_no"]))
-    return all_rows
+            d = dict(zip(_HOP_FIELDS, row))
+            d["step_no"] = i
+            yield d
@@ -1,7 +1,10 @@
 from lxml import etree as ET
 from typing import List, Dict, Tuple
 from collections import defaultdict
+from functools import lru_cache
+from types import MappingProxyType
 import re
+import sys
 import storage as st
 
 # ---- Optional SQL parser (sqlglot). Script works without it; edges from SQL are skipped if missing.
@@ -16,12 +19,50 @@ except Exception:  # pragma: no cover
 # Small helpers
 # ==========================
 
+# identifier tokens in expression text (compiled once; the class is ASCII-only anyway)
+_IDENT_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*", re.ASCII)
+
+
+def _lc_tokens(text: str):
+    """Distinct identifier tokens of `text`, lowercased, in first-seen order."""
+    if text.isascii():
+        # one lower() over the whole text; only safe for ASCII, where lowercasing can't
+        # turn a non-token character into a token one
+        return dict.fromkeys(_IDENT_RE.findall(text.lower()))
+    return dict.fromkeys(map(str.lower, _IDENT_RE.findall(text)))
+
 def _id(*parts: str) -> str:
     return ":".join(p for p in parts if p is not None)
 
 
-def _aget(el, *names: str):
-    for n in names:
+# fixed-arity _id() for the hot call sites: no varargs tuple, no generator
+def _id2(a: str, b: str) -> str:
+    return a if b is None else a + ":" + b
+
+
+def _id3(a: str, b: str, c: str) -> str:
+    return a + ":" + b + ":" + c
+
+
+# attribute-name aliases across PowerCenter export dialects, canonical name first
+_FROM_INSTANCE_ATTRS = ("FROMINSTANCE", "FROM_INSTANCE", "FROMINSTANCENAME")
+_TO_INSTANCE_ATTRS   = ("TOINSTANCE",   "TO_INSTANCE",   "TOINSTANCENAME")
+_FROM_PORT_ATTRS     = ("FROMPORT", "FROM_FIELD", "FROMFIELD", "FROMPORTNAME", "FROMFIELDNAME")
+_TO_PORT_ATTRS       = ("TOPORT",   "TO_FIELD",   "TOFIELD",   "TOPORTNAME",   "TOFIELDNAME")
+_INSTANCE_NAME_ATTRS = ("NAME", "INSTANCE_NAME")
+_INSTANCE_TYPE_ATTRS = ("TYPE", "TRANSFORMATION_TYPE", "TRANSFORMATIONTYPE")
+_REFNAME_ATTRS       = ("TRANSFORMATION_NAME", "REFOBJECTNAME", "REF_OBJECT_NAME", "REFOBJECT_NAME", "TRANFIRMATION_NAME")
+_FOLDER_KEY_ATTRS    = _REFNAME_ATTRS + _INSTANCE_NAME_ATTRS
+_ASSOC_SOURCE_ATTRS  = ("ASSOCIATED_SOURCE_INSTANCE", "ASSOCIATEDSOURCEINSTANCE")
+
+
+def _aget(el, names: Tuple[str, ...]):
+    """First present attribute among `names` (one of the *_ATTRS tuples above), else None."""
+    # the canonical name is present in nearly every export: answer it before starting the loop
+    v = el.get(names[0])
+    if v is not None:
+        return v
+    for n in names[1:]:
         v = el.get(n)
         if v is not None:
             return v
@@ -31,7 +72,7 @@ def _aget(el, *names: str):
 def _collect_fields(def_el, tags: List[str]) -> List[Tuple[str, str]]:
     out: List[Tuple[str, str]] = []
     for tag in tags:
-        for f in def_el.findall(f"./{tag}"):
+        for f in def_el.iterchildren(tag):
             name = f.get("NAME") or f.get("FIELDNAME") or f.get("COLUMN_NAME")
             if not name:
                 continue
@@ -68,20 +109,67 @@ def _phys_oid(kind: str, full: str, folder: str, name: str) -> str:
         return f"{kind}:{full}"
     return f"{kind}:{folder.upper()}::{(name or '').upper()}"
 
+
+# PORTTYPE values come out of .upper() as a fresh string per port; map them back to the
+# (interned) literals so every port row shares one object per direction
+_DIRECTIONS = {d: d for d in ("INPUT", "OUTPUT", "VARIABLE")}
+
+
+class _PortColumns:
+    """A mapping's ports as parallel column lists (one list slot per cell instead of one dict
+    per port); rows() turns them into the storage row dicts at write time. A port_id seen before
+    is skipped on append, as insert_if_missing would skip it (first one wins)."""
+    FIELDS = ("port_id", "instance_id", "name", "dtype", "direction")
+    __slots__ = FIELDS + ("ids",)
+
+    def __init__(self):
+        for f in self.FIELDS:
+            setattr(self, f, [])
+        self.ids = set()
+
+    def __len__(self) -> int:
+        return len(self.port_id)
+
+    def __contains__(self, port_id: str) -> bool:
+        return port_id in self.ids
+
+    def append(self, port_id: str, instance_id: str, name: str, dtype: str, direction: str) -> None:
+        if port_id in self.ids:
+            return
+        self.ids.add(port_id)
+        self.port_id.append(port_id)
+        self.instance_id.append(instance_id)
+        self.name.append(sys.intern(name))   # the same column names recur across instances
+        self.dtype.append(sys.intern(dtype))
+        self.direction.append(_DIRECTIONS.get(direction, direction))
+
+    def truncate(self, n: int) -> None:
+        """Drop every port appended after the first `n`."""
+        self.ids.difference_update(self.port_id[n:])
+        for f in self.FIELDS:
+            del getattr(self, f)[n:]
+
+    def rows(self) -> List[Dict]:
+        fields = self.FIELDS
+        return [dict(zip(fields, vals))
+                for vals in zip(self.port_id, self.instance_id, self.name, self.dtype, self.direction)]
+
 # ==========================
 # Mapplet support
 # ==========================
 
 def _parse_mapplet_def(mp_el) -> Dict:
     """Extract a reusable mapplet definition from <MAPPLET>."""
-    trans = []        # [{name,type, fields:[{name,dir,dtype}], is_boundary:bool}]
-    edges_intra = []  # [{'from': (inst,port), 'to': (inst,port)}]
-    exprs_local = []  # [{'inst':..., 'port':..., 'raw':...}]
+    # Flat tuples rather than nested dicts: the definition is parsed once per folder and
+    # re-walked for every instance of the mapplet.
+    trans = []        # [(name, type, ((field name, dir, dtype), ...))]
+    edges_intra = []  # [(from inst, from port, to inst, to port)]
+    exprs_local = []  # [(inst, port, raw)]
 
     boundary_in_names:  set = set()
     boundary_out_names: set = set()
 
-    for t in mp_el.findall("./TRANSFORMATION"):
+    for t in mp_el.iterchildren("TRANSFORMATION"):
         t_name = t.get("NAME") or ""
         t_type = (t.get("TYPE") or "").strip().lower()
         is_in  = ("mapplet" in t_type) and ("input" in t_type)
@@ -92,17 +180,17 @@ def _parse_mapplet_def(mp_el) -> Dict:
         fields = []
         inputs_ci, vars_ci, outputs = {}, {}, []
 
-        for pf in t.findall("./TRANSFORMFIELD"):
+        for pf in t.iterchildren("TRANSFORMFIELD"):
             pname = pf.get("NAME")
             if not pname:
                 continue
             pdir  = (pf.get("PORTTYPE") or "").upper()
             dtype = pf.get("DATATYPE") or ""
-            fields.append({"name": pname, "dir": pdir, "dtype": dtype})
+            fields.append((pname, pdir, dtype))
 
             expr_text = _expr_text_from_port(pf)
             if expr_text and pdir in ("OUTPUT", "VARIABLE"):
-                exprs_local.append({"inst": t_name, "port": pname, "raw": expr_text})
+                exprs_local.append((t_name, pname, expr_text))
 
             if pdir == "INPUT":
                 inputs_ci[pname.lower()] = pname
@@ -115,42 +203,36 @@ def _parse_mapplet_def(mp_el) -> Dict:
         for od in outputs:
             if not od["expr_text"]:
                 continue
-            tokens = re.findall(r"[A-Za-z_][A-Za-z0-9_]*", od["expr_text"]) 
-            for tok in tokens:
-                tci = tok.lower()
+            for tci in _lc_tokens(od["expr_text"]):
                 if tci in inputs_ci:
-                    edges_intra.append({"from": (t_name, inputs_ci[tci]), "to": (t_name, od["name"])})
+                    edges_intra.append((t_name, inputs_ci[tci], t_name, od["name"]))
                 elif tci in vars_ci:
-                    edges_intra.append({"from": (t_name, vars_ci[tci]), "to": (t_name, od["name"])})
+                    edges_intra.append((t_name, vars_ci[tci], t_name, od["name"]))
 
-        trans.append({"name": t_name, "type": t.get("TYPE") or "Transformation",
-                      "fields": fields, "is_boundary": is_in or is_out})
+        trans.append((t_name, t.get("TYPE") or "Transformation", tuple(fields)))
 
     # mapplet-level connectors
-    for c in mp_el.findall(".//CONNECTOR"):
-        fi = _aget(c, "FROMINSTANCE", "FROM_INSTANCE", "FROMINSTANCENAME")
-        ti = _aget(c, "TOINSTANCE",   "TO_INSTANCE",   "TOINSTANCENAME")
-        fp = _aget(c, "FROMPORT", "FROM_FIELD", "FROMFIELD", "FROMPORTNAME", "FROMFIELDNAME")
-        tp = _aget(c, "TOPORT",  "TO_FIELD",   "TOFIELD",   "TOPORTNAME",  "TOFIELDNAME")
+    for c in mp_el.iter("CONNECTOR"):
+        fi = _aget(c, _FROM_INSTANCE_ATTRS)
+        ti = _aget(c, _TO_INSTANCE_ATTRS)
+        fp = _aget(c, _FROM_PORT_ATTRS)
+        tp = _aget(c, _TO_PORT_ATTRS)
         if fi and ti and fp and tp:
-            edges_intra.append({"from": (fi, fp), "to": (ti, tp)})
+            edges_intra.append((fi, fp, ti, tp))
 
     # external ports and their owning boundary transforms
     in_ports,  out_ports = set(), set()
     in_port_owners:  Dict[str, List[str]] = {}
     out_port_owners: Dict[str, List[str]] = {}
 
-    for t in trans:
-        tname = t["name"]
+    for tname, _, fields in trans:
         if tname in boundary_in_names:
-            for f in t["fields"]:
-                p = f["name"]; 
+            for p, _, _ in fields:
                 if not p: continue
                 in_ports.add(p)
                 in_port_owners.setdefault(p, []).append(tname)
         if tname in boundary_out_names:
-            for f in t["fields"]:
-                p = f["name"]; 
+            for p, _, _ in fields:
                 if not p: continue
                 out_ports.add(p)
                 out_port_owners.setdefault(p, []).append(tname)
@@ -166,122 +248,137 @@ def _parse_mapplet_def(mp_el) -> Dict:
     }
 
 
+# Repositories replicate the same mapplet across folders. A definition is parsed directly the
+# first time its (NAME, child count) is seen; once that pre-key repeats, copies are keyed by
+# their serialized XML so identical ones share one parse. Definitions are read-only.
+_MAPPLET_PREKEYS: set = set()
+_MAPPLET_DEFS: Dict[bytes, Dict] = {}
+_MAPPLET_CACHE_MAX = 4096
+
+
+def _mapplet_def(mp_el) -> Dict:
+    prekey = (mp_el.get("NAME"), len(mp_el))
+    if prekey not in _MAPPLET_PREKEYS:
+        if len(_MAPPLET_PREKEYS) >= _MAPPLET_CACHE_MAX:
+            _MAPPLET_PREKEYS.clear()
+        _MAPPLET_PREKEYS.add(prekey)
+        return _parse_mapplet_def(mp_el)
+    xml = ET.tostring(mp_el, with_tail=False)
+    mpdef = _MAPPLET_DEFS.get(xml)
+    if mpdef is None:
+        if len(_MAPPLET_DEFS) >= _MAPPLET_CACHE_MAX // 16:
+            _MAPPLET_DEFS.clear()
+        mpdef = _MAPPLET_DEFS[xml] = _parse_mapplet_def(mp_el)
+    return mpdef
+
+
 def _expand_mapplet_instance(mapping_id: str, inst_id: str, inst_name: str, mpdef: Dict,
-                             instances: List[Dict], ports: List[Dict], edges: List[Dict], exprs: List[Dict]):
+                             instances: List[Tuple[str, str, str]], ports: _PortColumns, edges: List[Tuple[str, str]], exprs: List[Dict]):
     inner_name_to_inst_id: Dict[str, str] = {}
 
     def _add_instance_local(inner_name: str, inner_type: str) -> str:
         prefixed_name = f"{inst_name}.{inner_name}"
-        iid = _id(mapping_id, prefixed_name)
-        instances.append({
-            "instance_id": iid,
-            "mapping_id": mapping_id,
-            "type": inner_type or "Transformation",
-            "name": prefixed_name,
-        })
+        iid = sys.intern(_id2(mapping_id, prefixed_name))
+        instances.append((iid, inner_type or "Transformation", prefixed_name))
         return iid
 
     def _add_port_local(iid: str, name: str, direction: str, dtype: str = ""):
-        ports.append({
-            "port_id": _id(iid, name),
-            "instance_id": iid,
-            "name": name,
-            "dtype": dtype,
-            "direction": direction,
-        })
+        ports.append(_id2(iid, name), iid, name, dtype, direction)
 
     # 1) inner transforms and ports
-    for t in mpdef["transforms"]:
-        inner_name = t["name"]
-        inner_type = t["type"]
+    for inner_name, inner_type, fields in mpdef["transforms"]:
         pref_id = _add_instance_local(inner_name, inner_type)
         inner_name_to_inst_id[inner_name] = pref_id
-        for f in t["fields"]:
-            direction = f.get("dir") or "VARIABLE"
-            _add_port_local(pref_id, f["name"], direction, f.get("dtype", ""))
+        for fname, fdir, fdtype in fields:
+            _add_port_local(pref_id, fname, fdir or "VARIABLE", fdtype)
 
     # 2) expressions on inner ports
-    for ex in mpdef["exprs"]:
-        pref_inst_id = inner_name_to_inst_id.get(ex["inst"])
+    for ex_inst, ex_port, ex_raw in mpdef["exprs"]:
+        pref_inst_id = inner_name_to_inst_id.get(ex_inst)
         if pref_inst_id:
             exprs.append({
-                "port_id": _id(pref_inst_id, ex["port"]),
+                "port_id": _id2(pref_inst_id, ex_port),
                 "kind": "expr",
-                "raw": ex["raw"],
+                "raw": ex_raw,
                 "meta": None,
             })
 
     # 3) inner edges
-    for ed in mpdef["edges"]:
-        fi, fp = ed["from"]; ti, tp = ed["to"]
+    for fi, fp, ti, tp in mpdef["edges"]:
         fi_id = inner_name_to_inst_id.get(fi); ti_id = inner_name_to_inst_id.get(ti)
         if fi_id and ti_id:
-            edges.append({"from_port_id": _id(fi_id, fp), "to_port_id": _id(ti_id, tp)})
+            edges.append((_id2(fi_id, fp), _id2(ti_id, tp)))
 
     # 4) external ports on the mapplet instance
     for p in mpdef["in_ports"]:
-        ports.append({
-            "port_id": _id(inst_id, p),
-            "instance_id": inst_id,
-            "name": p,
-            "dtype": "",
-            "direction": "INPUT",
-        })
+        ports.append(_id2(inst_id, p), inst_id, p, "", "INPUT")
     for p in mpdef["out_ports"]:
-        ports.append({
-            "port_id": _id(inst_id, p),
-            "instance_id": inst_id,
-            "name": p,
-            "dtype": "",
-            "direction": "OUTPUT",
-        })
+        ports.append(_id2(inst_id, p), inst_id, p, "", "OUTPUT")
 
     # 5) bridges per-port to owning boundary transforms
     for p, owners in (mpdef.get("in_port_owners", {}) or {}).items():
         for owner in owners:
             inner_iid = inner_name_to_inst_id.get(owner)
             if inner_iid:
-                edges.append({
-                    "from_port_id": _id(inst_id, p),
-                    "to_port_id":   _id(inner_iid, p),
-                })
+                edges.append((_id2(inst_id, p), _id2(inner_iid, p)))
     for p, owners in (mpdef.get("out_port_owners", {}) or {}).items():
         for owner in owners:
             inner_iid = inner_name_to_inst_id.get(owner)
             if inner_iid:
-                edges.append({
-                    "from_port_id": _id(inner_iid, p),
-                    "to_port_id":   _id(inst_id, p),
-                })
+                edges.append((_id2(inner_iid, p), _id2(inst_id, p)))
 
 # ==========================
 # SQL override support
 # ==========================
 
+_SQL_ATTR_KEYWORDS = ("sql", "override", "query")
+
+
+# TABLEATTRIBUTE names are a small closed set repeated in every transformation of every
+# mapping: classify each distinct name once
+@lru_cache(maxsize=1024)
+def _is_sql_attr(name: str) -> bool:
+    name = name.lower()
+    return any(k in name for k in _SQL_ATTR_KEYWORDS)
+
+
+@lru_cache(maxsize=1024)
+def _join_attr(name: str) -> str:
+    """Lowercased attribute name if it holds a join condition ("join condition" /
+    "joiner condition" are covered by the substring test), else ""."""
+    name = name.lower()
+    return name if "join" in name else ""
+
+
 def _extract_sql_override_from_attrs(t) -> str:
-    for ta in t.findall("./TABLEATTRIBUTE"):
-        name = (ta.get("NAME") or "").lower()
+    for ta in t.iterchildren("TABLEATTRIBUTE"):
         val  = ta.get("VALUE") or ta.text or ""
         if not val:
             continue
-        if any(k in name for k in ("sql", "override", "query")):
+        if _is_sql_attr(ta.get("NAME") or ""):
             return val
     return ""
 
 
+_NO_SQL_DEPS = (MappingProxyType({}), MappingProxyType({}), "")
+
+
+@lru_cache(maxsize=1024)
 def _parse_sql_dependencies(sql: str):
     """
     Return (tables, selects, joins_text)
-      tables: dict alias->full (e.g., 'C'->'DB.SCH.TABLE')
-      selects: dict out_name -> list of (alias, column)
+      tables: mapping alias->full (e.g., 'C'->'DB.SCH.TABLE')
+      selects: mapping out_name -> tuple of (alias, column)
       joins_text: string with ON conditions
+    Cached per SQL text (overrides are often copied across mappings), so the result is shared:
+    both mappings are read-only views and the refs are tuples.
     """
     if not _HAS_SQLGLOT:
-        return {}, {}, ""
+        return _NO_SQL_DEPS
     try:
         root = _sg.parse_one(sql, read="ansi")
     except Exception:
-        return {}, {}, ""
+        return _NO_SQL_DEPS
 
     tables = {}
     for t in root.find_all(_sge.Table):
@@ -297,19 +394,12 @@ def _parse_sql_dependencies(sql: str):
             out = proj.alias_or_name
             if not out and isinstance(proj, _sge.Column):
                 out = proj.name
-            out = out or ""
-            refs = []
-            for col in proj.find_all(_sge.Column):
-                alias = (col.table or "")
-                name  = col.name or ""
-                if name:
-                    refs.append((alias, name))
-            if out:
-                seen = set()
-                for r in refs:
-                    if r not in seen:
-                        selects.setdefault(out, []).append(r)
-                        seen.add(r)
+            if not out:
+                continue
+            # (alias, column) refs in first-seen order, deduplicated in one dict build
+            refs = dict.fromkeys((col.table or "", col.name) for col in proj.find_all(_sge.Column) if col.name)
+            if refs:
+                selects.setdefault(out, []).extend(refs)
 
     join_parts = []
     for j in root.find_all(_sge.Join):
@@ -318,16 +408,21 @@ def _parse_sql_dependencies(sql: str):
             join_parts.append(on.sql())
     joins_text = " AND ".join(join_parts)
 
-    return tables, selects, joins_text
+    return (MappingProxyType(tables),
+            MappingProxyType({out: tuple(refs) for out, refs in selects.items()}),
+            joins_text)
 
 
 def _apply_sql_override(mapping_id: str, sq_inst_id: str, inst_name: str, sql_text: str, is_lookup: bool,
-                        instances: List[Dict], ports: List[Dict], edges: List[Dict], exprs: List[Dict],
-                        physical_objects: List[Dict], map_sources: List[Dict], instance_phys: List[Dict]):
+                        instances: List[Tuple[str, str, str]], ports: _PortColumns, edges: List[Tuple[str, str]], exprs: List[Dict],
+                        physical_objects: List[Dict], map_sources: List[Dict], instance_phys: List[Dict],
+                        sq_port_names: set = None):
+    """`sq_port_names`: names of the SQ/Lookup's INPUT/OUTPUT ports, when the caller collected them
+    while reading the transform; otherwise they are picked out of `ports`."""
     tables, selects, joins_text = _parse_sql_dependencies(sql_text)
     # record full SQL always for debugging
     exprs.append({
-        "port_id": _id(sq_inst_id, "__sql_override__"),
+        "port_id": _id2(sq_inst_id, "__sql_override__"),
         "kind": "expr",
         "raw": sql_text,
         "meta": "sql_override"
@@ -341,13 +436,8 @@ def _apply_sql_override(mapping_id: str, sq_inst_id: str, inst_name: str, sql_te
         if not alias:
             continue
         src_inst_name = f"SQLSRC_{inst_name}_{alias}"
-        src_inst_id   = _id(mapping_id, src_inst_name)
-        instances.append({
-            "instance_id": src_inst_id,
-            "mapping_id": mapping_id,
-            "type": "Source",
-            "name": src_inst_name,
-        })
+        src_inst_id   = sys.intern(_id2(mapping_id, src_inst_name))
+        instances.append((src_inst_id, "Source", src_inst_name))
         obj_id = _phys_oid("SRC", full, mapping_id.split(":")[0], full.split(".")[-1])
         physical_objects.append({
             "object_id": obj_id,
@@ -359,18 +449,19 @@ def _apply_sql_override(mapping_id: str, sq_inst_id: str, inst_name: str, sql_te
         instance_phys.append({"instance_id": src_inst_id, "object_id": obj_id, "role": "Source"})
         alias_to_inst[alias] = src_inst_id
 
-    # SQ/Lookup output ports index (accept INPUT/OUTPUT for safety across exports)
-    sq_out_ports = { p["name"]: p for p in ports
-                     if p["instance_id"] == sq_inst_id and (p.get("direction") or "").upper() in ("OUTPUT", "INPUT") }
+    # SQ/Lookup output port names (accept INPUT/OUTPUT for safety across exports)
+    sq_out_ports = sq_port_names
+    if sq_out_ports is None:
+        sq_out_ports = { name for iid, name, direction in zip(ports.instance_id, ports.name, ports.direction)
+                         if iid == sq_inst_id and (direction or "").upper() in ("OUTPUT", "INPUT") }
 
     # projections → edges
     for out_name, refs in selects.items():
-        sqp = sq_out_ports.get(out_name)
-        if not sqp:
+        if out_name not in sq_out_ports:
             continue
         # annotate output port with projection label
         exprs.append({
-            "port_id": _id(sq_inst_id, out_name),
+            "port_id": _id2(sq_inst_id, out_name),
             "kind": "expr",
             "raw": f"[sql_override] {out_name}",
             "meta": "sql_projection",
@@ -381,20 +472,13 @@ def _apply_sql_override(mapping_id: str, sq_inst_id: str, inst_name: str, sql_te
             src_inst_id = alias_to_inst.get(alias) or alias_to_inst.get(alias.upper()) or alias_to_inst.get(alias.lower())
             if not src_inst_id:
                 continue
-            src_port_id = _id(src_inst_id, col)
-            if not any(p["port_id"] == src_port_id for p in ports):
-                ports.append({
-                    "port_id": src_port_id,
-                    "instance_id": src_inst_id,
-                    "name": col,
-                    "dtype": "",
-                    "direction": "OUTPUT",
-                })
-            edges.append({"from_port_id": src_port_id, "to_port_id": _id(sq_inst_id, out_name)})
+            src_port_id = _id2(src_inst_id, col)
+            ports.append(src_port_id, src_inst_id, col, "", "OUTPUT")   # no-op if already present
+            edges.append((src_port_id, _id2(sq_inst_id, out_name)))
 
     if joins_text:
         exprs.append({
-            "port_id": _id(sq_inst_id, "__join__"),
+            "port_id": _id2(sq_inst_id, "__join__"),
             "kind": "join",
             "raw": joins_text,
             "meta": "sql_join",
@@ -408,60 +492,120 @@ def _full(db, schema, name):
     db = (db or "").upper(); schema = (schema or "").upper()
     return f"{db}.{schema}.{name}" if db and schema else name
 
-def _collect_folder_sources(folder_el) -> Dict[str, Dict]:
-    out = {}
-    for s in folder_el.findall("./SOURCE"):
-        sname = (s.get("NAME") or "").strip()
-        if not sname: continue
-        fields = _collect_fields(s, ["SOURCEFIELD", "FIELD"])
-        out[sname.upper()] = {
-            "fields": fields,
-            "db": (s.get("DBDNAME") or "").upper(),
-            "schema": (s.get("OWNERNAME") or "").upper(),
-            "name": sname,
-            "full": _full(s.get("DBDNAME"), s.get("OWNERNAME"), sname),
-        }
-    return out
+def _table_def(el, field_tags: List[str]) -> Dict:
+    """Field list and physical naming of a folder-level <SOURCE> or <TARGET>."""
+    name = (el.get("NAME") or "").strip()
+    return {
+        "fields": _collect_fields(el, field_tags),
+        "db": (el.get("DBDNAME") or "").upper(),
+        "schema": (el.get("OWNERNAME") or "").upper(),
+        "name": name,
+        "full": _full(el.get("DBDNAME"), el.get("OWNERNAME"), name),
+    }
 
-def _collect_folder_targets(folder_el) -> Dict[str, Dict]:
-    out = {}
-    for t in folder_el.findall("./TARGET"):
-        tname = (t.get("NAME") or "").strip()
-        if not tname: continue
-        fields = _collect_fields(t, ["TARGETFIELD", "FIELD"])
-        out[tname.upper()] = {
-            "fields": fields,
-            "db": (t.get("DBDNAME") or "").upper(),
-            "schema": (t.get("OWNERNAME") or "").upper(),
-            "name": tname,
-            "full": _full(t.get("DBDNAME"), t.get("OWNERNAME"), tname),
-        }
-    return out
+def _collect_folder(folder_el) -> Tuple[Dict[str, Dict], Dict[str, Dict], Dict[str, Dict], List]:
+    """One pass over a FOLDER's children, dispatching on tag:
+    (sources, targets, mapplets) keyed by upper-cased name, plus the MAPPING elements in order."""
+    sources, targets, mapplets, mappings = {}, {}, {}, []
+    for ch in folder_el:
+        tag = ch.tag
+        if tag == "MAPPING":
+            mappings.append(ch)
+            continue
+        if tag == "SOURCE" or tag == "TARGET":
+            nameU = (ch.get("NAME") or "").strip().upper()
+            if nameU and tag == "SOURCE":
+                sources[nameU] = _table_def(ch, ["SOURCEFIELD", "FIELD"])
+            elif nameU:
+                targets[nameU] = _table_def(ch, ["TARGETFIELD", "FIELD"])
+        elif tag == "MAPPLET":
+            nameU = (ch.get("NAME") or "").strip().upper()
+            if nameU:
+                mapplets[nameU] = _mapplet_def(ch)
+        else:
+            continue
+        ch.clear()   # definition extracted: free its subtree before the mappings are parsed
+    return sources, targets, mapplets, mappings
+
+_NO_FOLDER_KIND = (False, False, False)
 
-def _collect_folder_mapplets(folder_el) -> Dict[str, Dict]:
+def _folder_kinds(sources: Dict[str, Dict], targets: Dict[str, Dict],
+                  mapplets: Dict[str, Dict]) -> Dict[str, Tuple[bool, bool, bool]]:
+    """upper-cased name -> (is a folder SOURCE, is a folder TARGET, is a folder MAPPLET), so the
+    INSTANCE classifier answers all three with one probe."""
     out = {}
-    for mp in folder_el.findall("./MAPPLET"):
-        nameU = (mp.get("NAME") or "").strip().upper()
-        if nameU:
-            out[nameU] = _parse_mapplet_def(mp)
+    for k in sources.keys() | targets.keys() | mapplets.keys():
+        out[k] = (k in sources, k in targets, k in mapplets)
     return out
 
 # ==========================
 # Repo-level parser (single file with many mappings)
 # ==========================
 
+# Mappings parsed by parse_repo_file() stage their rows here and are written every FLUSH_EVERY
+# mappings or once FLUSH_ROWS rows are staged (whichever comes first), one storage call per
+# table, instead of ten storage calls per mapping.
+FLUSH_EVERY = 64
+FLUSH_ROWS = 50_000
+_BATCH = None   # {(op, table, keys): rows} while parse_repo_file() runs, else None
+_BATCH_ROWS = 0
+
+
+def _persist(op: str, table: str, rows: List[Dict], keys: Tuple[str, ...]) -> None:
+    if _BATCH is None:
+        (st.upsert if op == "upsert" else st.insert_if_missing)(table, rows, keys)
+        return
+    global _BATCH_ROWS
+    _BATCH.setdefault((op, table, keys), []).extend(rows)
+    _BATCH_ROWS += len(rows)
+
+
+def _flush() -> None:
+    global _BATCH_ROWS
+    # both ops apply rows in order and see earlier rows of the same call, so one call over the
+    # concatenated rows stores exactly what the per-mapping calls would have
+    for (op, table, keys), rows in _BATCH.items():
+        (st.upsert if op == "upsert" else st.insert_if_missing)(table, rows, keys)
+    _BATCH.clear()
+    _BATCH_ROWS = 0
+
+
 def parse_repo_file(xml_path: str) -> None:
-    ctx = ET.iterparse(xml_path, events=("end",))
-    for event, elem in ctx:
-        if elem.tag == "FOLDER":
+    global _BATCH
+    _BATCH = {}
+    pending = 0
+    try:
+        # tag= makes lxml filter events in C; only finished FOLDER subtrees reach Python.
+        ctx = ET.iterparse(xml_path, events=("end",), tag="FOLDER")
+        for event, elem in ctx:
             folder_name = elem.get("NAME") or "UNKNOWN"
-            f_sources  = _collect_folder_sources(elem)
-            f_targets  = _collect_folder_targets(elem)
-            f_mapplets = _collect_folder_mapplets(elem)
-            for m in elem.findall("./MAPPING"):
-                parse_mapping_element(m, folder_name, f_sources, f_targets, f_mapplets)
+            f_sources, f_targets, f_mapplets, f_mappings = _collect_folder(elem)
+            f_kinds = _folder_kinds(f_sources, f_targets, f_mapplets)
+            for m in f_mappings:
+                parse_mapping_element(m, folder_name, f_sources, f_targets, f_mapplets, f_kinds)
+                m.clear()   # rows are staged; the mapping subtree is no longer needed
+                pending += 1
+                if pending >= FLUSH_EVERY or _BATCH_ROWS >= FLUSH_ROWS:
+                    _flush()
+                    pending = 0
+            # free the subtree and drop already-processed siblings so memory stays bounded
             elem.clear()
-    del ctx
+            parent = elem.getparent()
+            if parent is not None:
+                while elem.getprevious() is not None:
+                    del parent[0]
+        del ctx
+    finally:
+        _flush()
+        _BATCH = None
+
+
+def record_repo_file(xml_path: str) -> List[tuple]:
+    """Parse a repo file without touching storage; return the recorded writes for st.replay().
+    Safe to run in a worker process (no shared state)."""
+    with st.record() as ops:
+        parse_repo_file(xml_path)
+    return ops
 
 # ==========================
 # Main per-mapping parser (element-based)
@@ -470,14 +614,19 @@ def parse_repo_file(xml_path: str) -> None:
 def parse_mapping_element(mapping, folder: str,
                           folder_sources: Dict[str, Dict],
                           folder_targets: Dict[str, Dict],
-                          folder_mapplets: Dict[str, Dict]) -> str:
+                          folder_mapplets: Dict[str, Dict],
+                          folder_kinds: Dict[str, Tuple[bool, bool, bool]] = None) -> str:
     mapping_name = mapping.get("NAME") or "(unnamed)"
-    mapping_id = _id(folder, mapping_name)
+    if folder_kinds is None:
+        folder_kinds = _folder_kinds(folder_sources, folder_targets, folder_mapplets)
+    # ids recur in every instance/port/edge row of the mapping: intern them (and port names,
+    # see _PortColumns) so the rows share one string object each
+    mapping_id = sys.intern(_id2(folder, mapping_name))
 
     # Buckets
-    instances: List[Dict] = []
-    ports:     List[Dict] = []
-    edges:     List[Dict] = []
+    instances: List[Tuple[str, str, str]] = []   # (instance_id, type, name); row dicts only at persist
+    ports = _PortColumns()
+    edges:     List[Tuple[str, str]] = []   # (from_port_id, to_port_id); row dicts only at persist
     exprs:     List[Dict] = []
     physical_objects: List[Dict] = []
     map_sources: List[Dict] = []
@@ -486,23 +635,28 @@ def parse_mapping_element(mapping, folder: str,
     sq_assoc:  List[Dict] = []
 
     def _add_instance(inst_name: str, inst_type: str) -> str:
-        inst_id = _id(mapping_id, inst_name)
-        instances.append({
-            "instance_id": inst_id,
-            "mapping_id": mapping_id,
-            "type": inst_type,
-            "name": inst_name,
-        })
+        inst_id = sys.intern(_id2(mapping_id, inst_name))
+        instances.append((inst_id, inst_type, inst_name))
         return inst_id
 
-    def _add_port(inst_id: str, name: str, direction: str, dtype: str = ""):
-        ports.append({
-            "port_id": _id(inst_id, name),
-            "instance_id": inst_id,
-            "name": name,
-            "dtype": dtype,
-            "direction": direction,
-        })
+    def _add_port(inst_id: str, name: str, direction: str, dtype: str = "") -> str:
+        pid = _id2(inst_id, name)
+        ports.append(pid, inst_id, name, dtype, direction)
+        return pid
+
+    # expression tokens repeat and connectors often restate expression wiring: skip an edge
+    # already emitted here rather than carrying it for insert_if_missing to drop
+    edge_keys = set()
+
+    # port_id -> raw of its first kind="expr" row in `exprs`, for the REF_FIELD copy below
+    # (kept in step with the appends instead of rescanning `exprs` per alias)
+    expr_raw_by_pid: Dict[str, str] = {}
+
+    def _add_edge(from_pid: str, to_pid: str):
+        k = (from_pid, to_pid)
+        if k not in edge_keys:
+            edge_keys.add(k)
+            edges.append(k)
 
     def _add_ports_for_source_instance(inst_id: str, src_key: str):
         meta = folder_sources.get(src_key)
@@ -544,28 +698,29 @@ def parse_mapping_element(mapping, folder: str,
 
     # --- Transformations (instances + ports + strict edges from expressions)
     tx_names = set()
-    for t in mapping.findall("./TRANSFORMATION"):
+    for t in mapping.iterchildren("TRANSFORMATION"):
         t_name = t.get("NAME")
         t_type = t.get("TYPE") or "Transformation"
         tx_names.add(t_name)
         inst_id = _add_instance(t_name, t_type)
 
-        input_names: List[str] = []
-        var_names:   List[str] = []
+        # lowercased name -> port name (last wins), probed once per expression token
+        inputs_ci:   Dict[str, str] = {}
+        vars_ci:     Dict[str, str] = {}
+        io_names:    set = set()          # INPUT/OUTPUT port names, for SQL-override projections
         outputs:     List[Dict] = []
         var_exprs:   Dict[str, str] = {}
         ref_by_port: Dict[str, str] = {}  # OUTPUT/alias -> referenced port name
 
-        for pf in t.findall("./TRANSFORMFIELD"):
+        for pf in t.iterchildren("TRANSFORMFIELD"):
             pname = pf.get("NAME")
             if not pname:
                 continue
             pdir  = (pf.get("PORTTYPE") or "").upper()
             dtype = pf.get("DATATYPE") or ""
-            pid   = _id(inst_id, pname)
 
             direction = pdir if pdir in ("INPUT", "OUTPUT", "VARIABLE") else "VARIABLE"
-            _add_port(inst_id, pname, direction, dtype)
+            pid = _add_port(inst_id, pname, direction, dtype)
 
             # capture REF_FIELD (alias of another port)
             ref = (
@@ -585,65 +740,62 @@ def parse_mapping_element(mapping, folder: str,
                     "raw":    expr_text,
                     "meta":   expr_name,
                 })
+                expr_raw_by_pid.setdefault(pid, expr_text)
 
+            if direction != "VARIABLE":
+                io_names.add(pname)
             if direction == "INPUT":
-                input_names.append(pname)
+                inputs_ci[pname.lower()] = pname
             elif direction == "VARIABLE":
-                var_names.append(pname)
+                vars_ci[pname.lower()] = pname
                 if expr_text:
                     var_exprs[pname] = expr_text
             elif direction == "OUTPUT":
                 outputs.append({"name": pname, "expr_text": expr_text})
 
         # record join/filter text (metadata only)
-        for ta in t.findall("./TABLEATTRIBUTE"):
-            aname = (ta.get("NAME") or "").lower()
-            aval  = ta.get("VALUE") or ""
+        for ta in t.iterchildren("TABLEATTRIBUTE"):
+            aval = ta.get("VALUE") or ""
             if not aval:
                 continue
-            if "join" in aname or aname in ("join condition", "joiner condition"):
+            aname = _join_attr(ta.get("NAME") or "")
+            if aname:
                 exprs.append({
-                    "port_id": _id(inst_id, "__join__"),
+                    "port_id": _id2(inst_id, "__join__"),
                     "kind": "join",
                     "raw": aval,
                     "meta": aname,
                 })
 
-        inputs_ci = {n.lower(): n for n in input_names}
-        vars_ci   = {n.lower(): n for n in var_names}
+        # lowercased token -> port_id, resolved once per transform instead of once per token
+        input_pids = {tci: _id2(inst_id, n) for tci, n in inputs_ci.items()}
+        var_pids   = {tci: _id2(inst_id, n) for tci, n in vars_ci.items()}
+        # tokens naming none of these ports (functions, literals, keywords) are dropped by a
+        # C-level filter(), in order, before any Python-level work per token
+        port_tok = frozenset(inputs_ci.keys() | vars_ci.keys()).__contains__
 
         # STRICT wiring for VARIABLEs: tokens in a var's expression feed the var
         for vname, vexpr in var_exprs.items():
-            tokens = re.findall(r"[A-Za-z_][A-Za-z0-9_]*", vexpr)
-            v_pid  = _id(inst_id, vname)
-            for tok in tokens:
-                tci = tok.lower()
-                if tci in inputs_ci:
-                    in_pid = _id(inst_id, inputs_ci[tci])
+            v_pid  = _id2(inst_id, vname)
+            for tci in filter(port_tok, _lc_tokens(vexpr)):
+                in_pid = input_pids.get(tci)
+                if in_pid is not None:
                     if in_pid != v_pid:
-                        edges.append({"from_port_id": in_pid, "to_port_id": v_pid})
+                        _add_edge(in_pid, v_pid)
                 elif tci in vars_ci and vars_ci[tci] != vname:
-                    in_pid = _id(inst_id, vars_ci[tci])
-                    edges.append({"from_port_id": in_pid, "to_port_id": v_pid})
+                    _add_edge(var_pids[tci], v_pid)
 
         # STRICT wiring for OUTPUTs: tokens in OUTPUT expr feed the output
         for od in outputs:
             out_name = od["name"]
-            out_pid  = _id(inst_id, out_name)
+            out_pid  = _id2(inst_id, out_name)
             expr_txt = od["expr_text"] or ""
             if not expr_txt:
                 continue
-            tokens = re.findall(r"[A-Za-z_][A-Za-z0-9_]*", expr_txt)
-            for tok in tokens:
-                tci = tok.lower()
-                if tci in inputs_ci:
-                    in_pid = _id(inst_id, inputs_ci[tci])
-                    if in_pid != out_pid:
-                        edges.append({"from_port_id": in_pid, "to_port_id": out_pid})
-                elif tci in vars_ci:
-                    in_pid = _id(inst_id, vars_ci[tci])
-                    if in_pid != out_pid:
-                        edges.append({"from_port_id": in_pid, "to_port_id": out_pid})
+            for tci in filter(port_tok, _lc_tokens(expr_txt)):
+                in_pid = input_pids.get(tci) or var_pids.get(tci)
+                if in_pid is not None and in_pid != out_pid:
+                    _add_edge(in_pid, out_pid)
 
         # REF_FIELD wiring: referenced port -> OUTPUT alias
         all_ci = {}
@@ -652,17 +804,15 @@ def parse_mapping_element(mapping, folder: str,
         for od in outputs:
             all_ci.setdefault(od["name"].lower(), od["name"])
         for out_name, ref_name in ref_by_port.items():
-            out_pid = _id(inst_id, out_name)
+            out_pid = _id2(inst_id, out_name)
             ref_ci  = (ref_name or "").lower()
             src_name = all_ci.get(ref_ci)
             if not src_name or src_name == out_name:
                 continue
-            edges.append({"from_port_id": _id(inst_id, src_name), "to_port_id": out_pid})
+            _add_edge(_id2(inst_id, src_name), out_pid)
             # If OUTPUT had no expr, copy referenced expr for display
-            has_out_expr = any(e for e in exprs if e["port_id"] == out_pid and e["kind"] == "expr")
-            if not has_out_expr:
-                src_pid = _id(inst_id, src_name)
-                src_expr = next((e["raw"] for e in exprs if e["port_id"] == src_pid and e["kind"] == "expr"), "")
+            if out_pid not in expr_raw_by_pid:
+                src_expr = expr_raw_by_pid.get(_id2(inst_id, src_name), "")
                 if src_expr:
                     exprs.append({
                         "port_id": out_pid,
@@ -670,6 +820,7 @@ def parse_mapping_element(mapping, folder: str,
                         "raw":    src_expr,
                         "meta":   "via_ref_field",
                     })
+                    expr_raw_by_pid[out_pid] = src_expr
 
         # SQL overrides (SQ/Lookup)
         t_type_low = (t.get("TYPE") or "").strip().lower()
@@ -678,47 +829,85 @@ def parse_mapping_element(mapping, folder: str,
         if is_sq or is_lookup:
             sql_text = _extract_sql_override_from_attrs(t)
             if sql_text:
+                n_exprs = len(exprs)
                 _apply_sql_override(mapping_id, inst_id, inst_name=t.get("NAME"), sql_text=sql_text, is_lookup=is_lookup,
                                     instances=instances, ports=ports, edges=edges, exprs=exprs,
-                                    physical_objects=physical_objects, map_sources=map_sources, instance_phys=instance_phys)
-
-    # --- Pre-index connector directions for classification disambiguation
+                                    physical_objects=physical_objects, map_sources=map_sources, instance_phys=instance_phys,
+                                    sq_port_names=io_names)
+                for e in exprs[n_exprs:]:
+                    if e["kind"] == "expr":
+                        expr_raw_by_pid.setdefault(e["port_id"], e["raw"])
+
+    # --- Single CONNECTOR sweep: direction counts for classification disambiguation now,
+    # complete endpoints kept for edge emission once instances are materialized
     incoming = defaultdict(int)
     outgoing = defaultdict(int)
-    for c in mapping.findall(".//CONNECTOR"):
-        fi = _aget(c, "FROMINSTANCE", "FROM_INSTANCE", "FROMINSTANCENAME")
-        ti = _aget(c, "TOINSTANCE",   "TO_INSTANCE",   "TOINSTANCENAME")
+    connectors: List[Tuple[str, str, str, str]] = []
+    for c in mapping.iter("CONNECTOR"):
+        fi = _aget(c, _FROM_INSTANCE_ATTRS)
+        ti = _aget(c, _TO_INSTANCE_ATTRS)
         if fi: outgoing[fi] += 1
         if ti: incoming[ti] += 1
-
-    # --- INSTANCE binding (robust classification)
-    instance_type_by_name: Dict[str, str] = {}
-    instance_refname_by_name: Dict[str, str] = {}
-    instance_is_mapplet: Dict[str, bool] = {}
-    source_key_by_instance: Dict[str, str] = {}
-    target_key_by_instance: Dict[str, str] = {}
+        fp = _aget(c, _FROM_PORT_ATTRS)
+        tp = _aget(c, _TO_PORT_ATTRS)
+        if fi and fp and ti and tp:
+            connectors.append((fi, fp, ti, tp))
+
+    # --- INSTANCE binding (robust classification), materialized as each instance is classified
+    tx_names = frozenset(tx_names)
+    # name -> [type, upper-cased ref name, is mapplet, folder source key, folder target key] for
+    # every INSTANCE name (TRANSFORMATIONs included: SQ synthesis below), in first-seen order.
+    # A repeated name updates its entry (last type/ref wins, mapplet flag and folder keys stick)
+    # and forces a rebind of everything at the end.
+    bindings: Dict[str, list] = {}
+    rebind = False
+    bucket_lists = (instances, edges, exprs, physical_objects, map_sources, map_targets, instance_phys)
+    marks = [len(b) for b in bucket_lists]
+    ports_mark = len(ports)
+    bind_warnings: List[str] = []   # printed once binding is final
 
     def _resolve_source_folder_key(inst) -> str:
-        for a in ("TRANSFORMATION_NAME","REFOBJECTNAME","REF_OBJECT_NAME","REFOBJECT_NAME","TRANFIRMATION_NAME","NAME","INSTANCE_NAME"):
+        for a in _FOLDER_KEY_ATTRS:
             v = inst.get(a)
             if v and v.strip().upper() in folder_sources:
                 return v.strip().upper()
         return ""
 
     def _resolve_target_folder_key(inst) -> str:
-        for a in ("TRANSFORMATION_NAME","REFOBJECTNAME","REF_OBJECT_NAME","REFOBJECT_NAME","TRANFIRMATION_NAME","NAME","INSTANCE_NAME"):
+        for a in _FOLDER_KEY_ATTRS:
             v = inst.get(a)
             if v and v.strip().upper() in folder_targets:
                 return v.strip().upper()
         return ""
 
-    for inst in mapping.findall(".//INSTANCE"):
-        iname   = _aget(inst, "NAME", "INSTANCE_NAME")
+    def _bind_instance(iname: str, binding: list):
+        if iname in tx_names:   # materialized with its TRANSFORMATION above
+            return
+        itype, refU, is_mapplet, src_key, tgt_key = binding
+        inst_id = _add_instance(iname, itype)
+        # mapplet (kept as Transformation) expands in place
+        if is_mapplet and refU in folder_mapplets:
+            _expand_mapplet_instance(mapping_id, inst_id, iname, folder_mapplets[refU], instances, ports, edges, exprs)
+            return
+        if itype == "Source":
+            if src_key:
+                _add_ports_for_source_instance(inst_id, src_key)
+            else:
+                bind_warnings.append(f"[WARN] Source instance '{iname}' did not resolve to a folder SOURCE; skipping bind.")
+        elif itype == "Target":
+            if tgt_key:
+                _add_ports_for_target_instance(inst_id, tgt_key)
+            else:
+                bind_warnings.append(f"[WARN] Target instance '{iname}' did not resolve to a folder TARGET; skipping bind.")
+
+    for inst in mapping.iter("INSTANCE"):
+        iname   = _aget(inst, _INSTANCE_NAME_ATTRS)
         if not iname:
             continue
-        rawt    = (_aget(inst, "TYPE", "TRANSFORMATION_TYPE", "TRANSFORMATIONTYPE") or "").strip().lower()
-        refname = _aget(inst, "TRANSFORMATION_NAME", "REFOBJECTNAME", "REF_OBJECT_NAME", "REFOBJECT_NAME", "TRANFIRMATION_NAME") or ""
+        rawt    = (_aget(inst, _INSTANCE_TYPE_ATTRS) or "").strip().lower()
+        refname = _aget(inst, _REFNAME_ATTRS) or ""
         refU    = (refname or iname or "").strip().upper()
+        ref_is_source, ref_is_target, ref_is_mapplet = folder_kinds.get(refU, _NO_FOLDER_KIND)
 
         # Prefer explicit TYPE
         if rawt in ("source", "source definition"):
@@ -726,8 +915,6 @@ def parse_mapping_element(mapping, folder: str,
         elif rawt in ("target", "target definition"):
             itype = "Target"
         else:
-            ref_is_source = refU in folder_sources
-            ref_is_target = refU in folder_targets
             if ref_is_source and not ref_is_target:
                 itype = "Source"
             elif ref_is_target and not ref_is_source:
@@ -744,95 +931,99 @@ def parse_mapping_element(mapping, folder: str,
             else:
                 itype = "Transformation"
 
-        instance_type_by_name[iname] = itype
-        instance_refname_by_name[iname] = refname or iname
-
-        # mapplet detection (keep type as Transformation; we'll expand later)
-        is_mapplet = (rawt == "mapplet") or (refU in folder_mapplets)
-        if is_mapplet:
-            instance_is_mapplet[iname] = True
-
+        binding = bindings.get(iname)
+        first = binding is None
+        if first:
+            binding = bindings[iname] = [itype, "", False, "", ""]
+        else:
+            rebind = True
+        binding[0] = itype
+        # the mapplet lookup uses the ref name as written (not stripped)
+        binding[1] = (refname or iname).upper()
+        if rawt == "mapplet" or ref_is_mapplet:
+            binding[2] = True
         # store deterministic folder keys for binding
         if itype == "Source":
             k = _resolve_source_folder_key(inst)
-            if k: source_key_by_instance[iname] = k
+            if k: binding[3] = k
         elif itype == "Target":
             k = _resolve_target_folder_key(inst)
-            if k: target_key_by_instance[iname] = k
+            if k: binding[4] = k
 
         # Source Qualifier association(s) (remember for synthesis)
         if rawt == "source qualifier":
-            assoc_attr = _aget(inst, "ASSOCIATED_SOURCE_INSTANCE", "ASSOCIATEDSOURCEINSTANCE")
+            assoc_attr = _aget(inst, _ASSOC_SOURCE_ATTRS)
             if assoc_attr:
                 sq_assoc.append({
                     "mapping_id": mapping_id,
-                    "sq_instance_id": _id(mapping_id, iname),
+                    "sq_instance_id": _id2(mapping_id, iname),
                     "source_instance_name": assoc_attr.strip(),
                 })
-            for child in inst.findall("./ASSOCIATED_SOURCE_INSTANCE"):
+            for child in inst.iterchildren("ASSOCIATED_SOURCE_INSTANCE"):
                 nm = (child.get("NAME") or child.get("INSTANCE") or (child.text or "")).strip()
                 if nm:
                     sq_assoc.append({
                         "mapping_id": mapping_id,
-                        "sq_instance_id": _id(mapping_id, iname),
+                        "sq_instance_id": _id2(mapping_id, iname),
                         "source_instance_name": nm,
                     })
 
+        if first and not rebind:
+            _bind_instance(iname, binding)
+
     # Synthesize missing Source instances referenced by SQ associations
+    synthesized = []
     for link in sq_assoc:
         sname = link["source_instance_name"]
-        if sname not in instance_type_by_name:
-            instance_type_by_name[sname] = "Source"
+        if sname not in bindings:
             # choose a folder key if available
             sU = sname.strip().upper()
-            if sU in folder_sources:
-                source_key_by_instance[sname] = sU
-
-    # materialize non-TRANSFORMATION instances
-    for iname, itype in instance_type_by_name.items():
-        if iname in tx_names:
-            continue
-        inst_id = _add_instance(iname, itype)
-
-        refU = (instance_refname_by_name.get(iname, "") or "").upper()
-        if instance_is_mapplet.get(iname) and refU in folder_mapplets:
-            _expand_mapplet_instance(mapping_id, inst_id, iname, folder_mapplets[refU], instances, ports, edges, exprs)
-            continue
-        if itype == "Source":
-            key = source_key_by_instance.get(iname, "")
-            if key:
-                _add_ports_for_source_instance(inst_id, key)
-            else:
-                print(f"[WARN] Source instance '{iname}' did not resolve to a folder SOURCE; skipping bind.")
-        elif itype == "Target":
-            key = target_key_by_instance.get(iname, "")
-            if key:
-                _add_ports_for_target_instance(inst_id, key)
-            else:
-                print(f"[WARN] Target instance '{iname}' did not resolve to a folder TARGET; skipping bind.")
+            bindings[sname] = ["Source", "", False, sU if sU in folder_sources else "", ""]
+            synthesized.append(sname)
+
+    if rebind:
+        # drop what the first occurrences bound and bind every name from its final entry,
+        # in first-seen order
+        for b, n in zip(bucket_lists, marks):
+            del b[n:]
+        ports.truncate(ports_mark)
+        bind_warnings.clear()
+        for iname, binding in bindings.items():
+            _bind_instance(iname, binding)
+    else:
+        for sname in synthesized:
+            _bind_instance(sname, bindings[sname])
+    for w in bind_warnings:
+        print(w)
 
     # --- CONNECTOR edges (strict)
-    for c in mapping.findall(".//CONNECTOR"):
-        fi = _aget(c, "FROMINSTANCE", "FROM_INSTANCE", "FROMINSTANCENAME")
-        ti = _aget(c, "TOINSTANCE",   "TO_INSTANCE",   "TOINSTANCENAME")
-        fp = _aget(c, "FROMPORT", "FROM_FIELD", "FROMFIELD", "FROMPORTNAME", "FROMFIELDNAME")
-        tp = _aget(c, "TOPORT",  "TO_FIELD",   "TOFIELD",   "TOPORTNAME",  "TOFIELDNAME")
-        if not (fi and fp and ti and tp):
-            continue
-        from_pid = _id(_id(mapping_id, fi), fp)
-        to_pid   = _id(_id(mapping_id, ti), tp)
-        edges.append({"from_port_id": from_pid, "to_port_id": to_pid})
-
-    # Persist
-    st.upsert("mappings", [{"mapping_id": mapping_id, "name": mapping_name, "folder": folder}], ("mapping_id",))
-    st.insert_if_missing("instances", instances, ("instance_id",))
-    st.insert_if_missing("ports", ports, ("port_id",))
-    st.insert_if_missing("edges", edges, ("from_port_id", "to_port_id"))
-    st.insert_if_missing("expressions", exprs, ("port_id", "kind", "raw"))
-    st.insert_if_missing("physical_objects", physical_objects, ("object_id",))
-    st.insert_if_missing("map_sources", map_sources, ("mapping_id", "object_id"))
-    st.insert_if_missing("map_targets", map_targets, ("mapping_id", "object_id"))
-    st.insert_if_missing("instance_phys", instance_phys, ("instance_id", "object_id"))
-    st.insert_if_missing("sq_assoc", sq_assoc, ("mapping_id", "sq_instance_id", "source_instance_name"))
+    # a port fans out to / is fed by many connectors: build each endpoint id once and share it
+    conn_pids: Dict[Tuple[str, str], str] = {}
+
+    def _conn_pid(inst_name: str, port_name: str) -> str:
+        k = (inst_name, port_name)
+        pid = conn_pids.get(k)
+        if pid is None:
+            pid = conn_pids[k] = _id3(mapping_id, inst_name, port_name)
+        return pid
+
+    for fi, fp, ti, tp in connectors:
+        _add_edge(_conn_pid(fi, fp), _conn_pid(ti, tp))
+
+    # Persist (staged in _BATCH when called from parse_repo_file)
+    _persist("upsert", "mappings", [{"mapping_id": mapping_id, "name": mapping_name, "folder": folder}], ("mapping_id",))
+    _persist("insert_if_missing", "instances",
+             [{"instance_id": i, "mapping_id": mapping_id, "type": t, "name": n} for i, t, n in instances],
+             ("instance_id",))
+    _persist("insert_if_missing", "ports", ports.rows(), ("port_id",))
+    # dict.fromkeys: drop repeats from the mapplet/SQL-override emitters too, keeping first-seen order
+    _persist("insert_if_missing", "edges", [{"from_port_id": f, "to_port_id": t} for f, t in dict.fromkeys(edges)],
+             ("from_port_id", "to_port_id"))
+    _persist("insert_if_missing", "expressions", exprs, ("port_id", "kind", "raw"))
+    _persist("insert_if_missing", "physical_objects", physical_objects, ("object_id",))
+    _persist("insert_if_missing", "map_sources", map_sources, ("mapping_id", "object_id"))
+    _persist("insert_if_missing", "map_targets", map_targets, ("mapping_id", "object_id"))
+    _persist("insert_if_missing", "instance_phys", instance_phys, ("instance_id", "object_id"))
+    _persist("insert_if_missing", "sq_assoc", sq_assoc, ("mapping_id", "sq_instance_id", "source_instance_name"))
 
     return mapping_id
@@ -1,13 +1,23 @@
 
+from contextlib import contextmanager
 from pathlib import Path
 import json
+import sys
 
 BASE = Path(__file__).resolve().parent / "data"
-TABLES = ["mappings","instances","ports","edges","expressions","physical_objects","map_sources","map_targets"]
+TABLES = ["mappings","instances","ports","edges","expressions","physical_objects","map_sources","map_targets",
+          "instance_phys","sq_assoc"]
+
+# When set (see record()), writes are captured here as (op, table, rows, keys) instead of hitting disk.
+_RECORDING = None
+
+# Derived read-only indexes: name -> (signature of source tables, value). See _memo().
+_MEMO = {}
 
 def _path(table): return BASE / f"{table}.json"
 
 def reset_all():
+    _MEMO.clear()
     BASE.mkdir(parents=True, exist_ok=True)
     for t in TABLES:
         (_path(t)).write_text("[]", encoding="utf-8")
@@ -21,6 +31,7 @@ def _load(table):
         return []
 
 def _save(table, rows):
+    _MEMO.clear()
     _path(table).write_text(json.dumps(rows, ensure_ascii=False, indent=0), encoding="utf-8")
 
 def all_rows(table): return _load(table)
@@ -35,9 +46,11 @@ def where(table, **kwargs):
     rows = _load(table)
     return [r for r in rows if all(r.get(k)==v for k,v in kwargs.items())]
 
-def upsert(table, rows, keys):
-    existing = _load(table)
-    index = {tuple(r.get(k) for k in keys): i for i, r in enumerate(existing)}
+def _upsert_rows(existing, rows, keys, index=None):
+    """`index` (key tuple -> position in `existing`), when given, must cover `existing` and is
+    kept up to date; otherwise it is built here."""
+    if index is None:
+        index = {tuple(r.get(k) for k in keys): i for i, r in enumerate(existing)}
     for r in rows:
         k = tuple(r.get(k) for k in keys)
         if k in index:
@@ -46,13 +59,317 @@ def upsert(table, rows, keys):
         else:
             index[k] = len(existing)
             existing.append(r)
+
+def _insert_missing_rows(existing, rows, keys, index=None):
+    """See _upsert_rows() for `index`."""
+    if index is None:
+        index = {tuple(r.get(k) for k in keys): i for i, r in enumerate(existing)}
+    for r in rows:
+        k = tuple(r.get(k) for k in keys)
+        if k not in index:
+            index[k] = len(existing)
+            existing.append(r)
+
+def upsert(table, rows, keys):
+    if _RECORDING is not None:
+        _RECORDING.append(("upsert", table, list(rows), tuple(keys))); return
+    existing = _load(table)
+    _upsert_rows(existing, rows, keys)
     _save(table, existing)
 
 def insert_if_missing(table, rows, keys):
+    if _RECORDING is not None:
+        _RECORDING.append(("insert_if_missing", table, list(rows), tuple(keys))); return
     existing = _load(table)
-    seen = {tuple(r.get(k) for k in keys) for r in existing}
-    for r in rows:
-        k = tuple(r.get(k) for k in keys)
-        if k not in seen:
-            existing.append(r); seen.add(k)
+    _insert_missing_rows(existing, rows, keys)
     _save(table, existing)
+
+# ---- memoized indexes (shared objects: callers must not mutate them)
+
+def _sig(tables):
+    out = []
+    for t in tables:
+        try:
+            s = _path(t).stat(); out.append((s.st_mtime_ns, s.st_size))
+        except OSError:
+            out.append(None)
+    return tuple(out)
+
+def corpus_signature():
+    """(mtime_ns, size) of every table file. Changes whenever any process rewrites the corpus,
+    so per-process caches can key on it."""
+    return _sig(TABLES)
+
+# Id columns whose values recur across tables (a port_id is also an edge's from/to_port_id, ...).
+_ID_FIELDS = ("mapping_id", "instance_id", "port_id", "from_port_id", "to_port_id", "object_id")
+
+def _load_interned(table):
+    """_load() with id values interned, so the long-lived memoized views share one string per id
+    and cross-table dict/set lookups mostly short-circuit on identity."""
+    rows = _load(table)
+    intern = sys.intern
+    for r in rows:
+        for f in _ID_FIELDS:
+            v = r.get(f)
+            if type(v) is str:
+                r[f] = intern(v)
+    return rows
+
+def _memo(name, tables, build):
+    """Return build() cached until one of `tables` changes on disk (or is written here)."""
+    sig = _sig(tables)
+    hit = _MEMO.get(name)
+    if hit is not None and hit[0] == sig:
+        return hit[1]
+    val = build()
+    _MEMO[name] = (sig, val)
+    return val
+
+def index(table, key_field):
+    return _memo(("index", table, key_field), (table,),
+                 lambda: {r.get(key_field): r for r in _load_interned(table)})
+
+def columns(table, *fields):
+    """Column-wise (SoA) view of a table: one tuple per field, all aligned by row position."""
+    def build():
+        rows = _load_interned(table)
+        return tuple(tuple(r.get(f) for r in rows) for f in fields)
+    return _memo(("columns", table) + fields, (table,), build)
+
+def edge_from_ports():
+    return _memo("edge_from_ports", ("edges",), lambda: frozenset(columns("edges", "from_port_id")[0]))
+
+def targetish_ports():
+    """Ports that look like a lineage end point: on a Target instance, or an INPUT with no outgoing edge."""
+    def build():
+        insts = index("instances", "instance_id")
+        has_out = edge_from_ports()
+        out = []
+        for p in _load_interned("ports"):
+            inst = insts.get(p["instance_id"])
+            if not inst:
+                continue
+            if inst.get("type") == "Target" or (p["direction"] == "INPUT" and p["port_id"] not in has_out):
+                out.append(p)
+        return out
+    return _memo("targetish_ports", ("ports", "instances", "edges"), build)
+
+def targetish_ports_norm():
+    """(normalized name, port) for targetish_ports(); name is lowercased with underscores removed."""
+    return _memo("targetish_ports_norm", ("ports", "instances", "edges"),
+                 lambda: tuple((p["name"].lower().replace("_", ""), p) for p in targetish_ports()))
+
+def edges_lc():
+    """(to_port_id.lower(), from_port_id.lower(), edge) for every edge."""
+    return _memo("edges_lc", ("edges",),
+                 lambda: tuple(((e["to_port_id"] or "").lower(), (e["from_port_id"] or "").lower(), e)
+                               for e in _load_interned("edges")))
+
+def edge_port_ids_lc():
+    """(lowercased from_port_ids, lowercased to_port_ids) over all edges, as frozensets."""
+    def build():
+        lc = edges_lc()
+        return frozenset(f for _, f, _ in lc), frozenset(t for t, _, _ in lc)
+    return _memo("edge_port_ids_lc", ("edges",), build)
+
+def ports_by_name_lc():
+    """lowercased port name -> (port, ...) in table order."""
+    def build():
+        out = {}
+        for p in _load_interned("ports"):
+            out.setdefault((p.get("name", "") or "").lower(), []).append(p)
+        return {k: tuple(v) for k, v in out.items()}
+    return _memo("ports_by_name_lc", ("ports",), build)
+
+def input_ports_by_instance():
+    """instance_id -> {lowercased port name: port} over INPUT ports; first port wins on a name clash."""
+    def build():
+        out = {}
+        for p in index("ports", "port_id").values():
+            if p["direction"] == "INPUT":
+                out.setdefault(p["instance_id"], {}).setdefault((p["name"] or "").lower(), p)
+        return out
+    return _memo("input_ports_by_instance", ("ports",), build)
+
+def expr_by_port():
+    """port_id -> raw text of its first kind="expr" expression row."""
+    def build():
+        out = {}
+        for e in _load_interned("expressions"):
+            if e.get("kind") == "expr":
+                out.setdefault(e.get("port_id"), e.get("raw", ""))
+        return out
+    return _memo("expr_by_port", ("expressions",), build)
+
+def join_by_instance():
+    """instance_id -> raw text of its first kind="join" row (stored on port "<instance_id>:__join__")."""
+    def build():
+        out = {}
+        for e in _load_interned("expressions"):
+            if e.get("kind") == "join":
+                out.setdefault(str(e.get("port_id", "")).rpartition(":")[0], e.get("raw", ""))
+        return out
+    return _memo("join_by_instance", ("expressions",), build)
+
+def upstream_by_to_lc():
+    """to_port_id.lower() -> (from_port_id, ...) in first-seen edge order, without duplicates
+    (the lineage walk's adjacency)."""
+    def build():
+        out = {}
+        for to_lc, _, e in edges_lc():
+            out.setdefault(to_lc, {})[e["from_port_id"]] = None
+        return {k: tuple(v) for k, v in out.items()}
+    return _memo("upstream_by_to_lc", ("edges",), build)
+
+def upstream_hops_by_to_lc():
+    """upstream_by_to_lc() with each upstream pre-resolved to
+    (from_port_id, from_port_id.lower(), port row, instance row); upstreams whose port or
+    instance is missing are dropped. The lineage walk follows object references instead of
+    re-probing the port and instance indexes (or lowercasing ids) for every edge."""
+    def build():
+        ports, insts = index("ports", "port_id"), index("instances", "instance_id")
+        out = {}
+        for to_lc, ups in upstream_by_to_lc().items():
+            hops = []
+            for up in ups:
+                fp = ports.get(up)
+                fi = insts.get(fp["instance_id"]) if fp else None
+                if fi:
+                    hops.append((up, (up or "").lower(), fp, fi))
+            out[to_lc] = tuple(hops)
+        return out
+    return _memo("upstream_hops_by_to_lc", ("edges", "ports", "instances"), build)
+
+def inst_to_obj_map():
+    """instance_id -> physical object_id (from instance_phys)."""
+    return _memo("inst_to_obj", ("instance_phys",),
+                 lambda: {r["instance_id"]: r["object_id"] for r in _load_interned("instance_phys")})
+
+def mapping_id_by_name():
+    """mapping name -> mapping_id; the first mapping in table order wins when names repeat."""
+    def build():
+        out = {}
+        for mid, m in index("mappings", "mapping_id").items():
+            out.setdefault(m["name"], mid)
+        return out
+    return _memo("mapping_id_by_name", ("mappings",), build)
+
+def mapping_name_by_instance():
+    """instance_id -> name of the mapping it belongs to (instances of unknown mappings are left out)."""
+    def build():
+        maps = index("mappings", "mapping_id")
+        return {iid: maps[i["mapping_id"]]["name"]
+                for iid, i in index("instances", "instance_id").items() if i.get("mapping_id") in maps}
+    return _memo("mapping_name_by_instance", ("mappings", "instances"), build)
+
+def full_name_by_instance():
+    """instance_id -> physical full_name, for instances bound to a physical object with a full name."""
+    def build():
+        phys = index("physical_objects", "object_id")
+        out = {}
+        for iid, obj_id in inst_to_obj_map().items():
+            full = phys.get(obj_id, {}).get("full_name", "") if obj_id else ""
+            if full:
+                out[iid] = full
+        return out
+    return _memo("full_name_by_instance", ("instance_phys", "physical_objects"), build)
+
+def source_fulls_by_sq():
+    """Source Qualifier instance_id -> [physical full_name of each associated source instance
+    that resolves], in sq_assoc order."""
+    def build():
+        full_by_inst = full_name_by_instance()
+        out = {}
+        for r in _load_interned("sq_assoc"):
+            fulls = out.setdefault(r["sq_instance_id"], [])
+            full = full_by_inst.get(f"{r['mapping_id']}:{r['source_instance_name']}")
+            if full:
+                fulls.append(full)
+        return out
+    return _memo("source_fulls_by_sq", ("sq_assoc", "instance_phys", "physical_objects"), build)
+
+def cross_targets_by_full():
+    """physical full_name -> ((mapping name, mapping_id, target instance_id), ...): every mapping
+    that writes that physical target, resolved to its target instance, in map_targets order.
+    Mapping names resolve through mapping_id_by_name(); unresolvable entries are dropped."""
+    def build():
+        phys, maps = index("physical_objects", "object_id"), index("mappings", "mapping_id")
+        map_names_by_full, tgt_inst_by_map_full = {}, {}
+        for mt in _load_interned("map_targets"):
+            obj = phys[mt["object_id"]]
+            full = obj["full_name"]
+            map_names_by_full.setdefault(full, []).append(maps[mt["mapping_id"]]["name"])
+            tgt_inst_by_map_full.setdefault((mt["mapping_id"], full), obj["name"])
+        mid_by_name = mapping_id_by_name()
+        out = {}
+        for full, names in map_names_by_full.items():
+            hits = []
+            for name in names:
+                mid = mid_by_name.get(name, "")
+                tgt_inst_name = tgt_inst_by_map_full.get((mid, full), "") if mid else ""
+                if tgt_inst_name:
+                    hits.append((name, mid, f"{mid}:{tgt_inst_name}"))
+            out[full] = tuple(hits)
+        return out
+    return _memo("cross_targets_by_full", ("map_targets", "physical_objects", "mappings"), build)
+
+def instance_id_by_mapping_and_name():
+    """(mapping name, instance name) -> instance_id. When a mapping name repeats across
+    folders, the mapping listed first in the mappings table wins."""
+    def build():
+        rank, name_of = {}, {}
+        for i, m in enumerate(_load_interned("mappings")):
+            rank[m["mapping_id"]] = i
+            name_of[m["mapping_id"]] = m["name"]
+        best = {}
+        for inst in _load_interned("instances"):
+            mid = inst["mapping_id"]
+            if mid not in rank or inst["instance_id"] != f"{mid}:{inst['name']}":
+                continue
+            key = (name_of[mid], inst["name"])
+            if key not in best or rank[mid] < best[key][0]:
+                best[key] = (rank[mid], inst["instance_id"])
+        return {k: iid for k, (_, iid) in best.items()}
+    return _memo("instance_id_by_mapping_and_name", ("mappings", "instances"), build)
+
+# ---- snapshots / deferred writes (used by the corpus cache in app.py)
+
+def load_snapshot(tables):
+    BASE.mkdir(parents=True, exist_ok=True)
+    for t in TABLES:
+        _save(t, tables.get(t, []))
+
+@contextmanager
+def record():
+    """Capture upsert/insert_if_missing calls instead of applying them.
+    Yields the op list; apply it later (in order) with replay()."""
+    global _RECORDING
+    prev, _RECORDING = _RECORDING, []
+    try:
+        yield _RECORDING
+    finally:
+        _RECORDING = prev
+
+def replay(ops, tables=None, indexes=None):
+    """Apply recorded ops in order: to disk, or, given `tables` ({table: rows}), to those
+    in-memory lists without touching storage.
+
+    `indexes` holds the key index of each (table, keys) between calls: pass the same dict to
+    every replay() into the same `tables` so merging many files stays linear in their rows."""
+    if tables is None:
+        for op, table, rows, keys in ops:
+            (upsert if op == "upsert" else insert_if_missing)(table, rows, keys)
+        return
+    if indexes is None:
+        indexes = {}
+    for op, table, rows, keys in ops:
+        existing = tables.setdefault(table, [])
+        ent = indexes.get((table, keys))
+        if ent is None:
+            ent = indexes[(table, keys)] = [{}, 0]   # [key -> position, rows indexed so far]
+        index = ent[0]
+        # catch up on rows appended by ops keyed differently
+        for i in range(ent[1], len(existing)):
+            index[tuple(existing[i].get(k) for k in keys)] = i
+        (_upsert_rows if op == "upsert" else _insert_missing_rows)(existing, rows, keys, index)
+        ent[1] = len(existing)